@@ -0,0 +1,186 @@
+"""
+Benchmark: vectorized feature step (downsell.features) against the
+notebook's cell-by-cell code (Series.apply classifiers, .loc assignments).
+
+    python -m benchmarks.bench_features --rows 850000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from downsell.features import build_features, DATE_REFERENCE
+
+
+def synthetic_panel(n, seed=42):
+    """M1/M2/M3 panel with the notebook column names"""
+    rng = np.random.default_rng(seed)
+    arpu_m2 = rng.gamma(0.8, 4000, n)
+    dates = pd.Timestamp(DATE_REFERENCE) - pd.to_timedelta(rng.integers(0, 4000, n), 'D')
+    dates = pd.Series(dates).where(rng.random(n) > 0.05)
+    return pd.DataFrame({
+        'ID': np.arange(n),
+        'arpu_m2': arpu_m2,
+        'arpu_voix': arpu_m2 * rng.random(n),
+        'arpu_data': arpu_m2 * rng.random(n) * 0.5,
+        'MOU': rng.gamma(0.5, 100, n) * (rng.random(n) > 0.1),
+        'NB_J_VOIX': rng.integers(0, 31, n).astype(np.float32),
+        'volume_data_in': rng.gamma(0.4, 1500, n) * (rng.random(n) > 0.3),
+        'OM_Montant': rng.gamma(0.3, 20000, n) * (rng.random(n) > 0.6),
+        'DATE_ACTIVATION': dates,
+        'arpu_m1': np.where(rng.random(n) > 0.1, arpu_m2 * rng.lognormal(0, 0.4, n), np.nan),
+        'arpu_m3': arpu_m2 * rng.lognormal(-0.1, 0.5, n),
+    })
+
+
+# ============================================================
+# NOTEBOOK CODE (cells 6, 8, 9, 10, 26, 37)
+# ============================================================
+
+def legacy_features(df):
+    df['arpu_m1'] = df['arpu_m1'].fillna(0)
+    df['variation_m1_m2'] = 0.0
+    mask = df['arpu_m1'] > 0
+    df.loc[mask, 'variation_m1_m2'] = (df.loc[mask, 'arpu_m2'] - df.loc[mask, 'arpu_m1']) / df.loc[mask, 'arpu_m1']
+    conditions = [
+        df['variation_m1_m2'] < -0.25,
+        (df['variation_m1_m2'] >= -0.25) & (df['variation_m1_m2'] <= 0.25),
+        df['variation_m1_m2'] > 0.25
+    ]
+    df['class_variation_m1_m2'] = np.select(conditions, ['Declining', 'Unchanged', 'Growing'], default='Inconnue')
+
+    df["down_sell"] = 0
+    df.loc[df["arpu_m3"] <= 0.75 * df["arpu_m2"], "down_sell"] = 1
+    date_reference = pd.to_datetime(DATE_REFERENCE)
+    df["seniority_days"] = (date_reference - df["DATE_ACTIVATION"]).dt.days
+    df["seniority_days"] = df["seniority_days"].fillna(-1)
+
+    def classer_anciennete(x):
+        if x == -1:
+            return "Unknowned"
+        elif x < 90:
+            return "Recent"
+        elif x < 270:
+            return "Medium"
+        elif x < 1080:
+            return "Established"
+        else:
+            return "Loyal"
+
+    df["seniority_class"] = df["seniority_days"].apply(classer_anciennete)
+
+    df["part_data"] = 0.0
+    df.loc[df["arpu_m2"] > 0, "part_data"] = df["arpu_data"] / df["arpu_m2"]
+    df["Call_intensity"] = 0.0
+    df.loc[df["NB_J_VOIX"] > 0, "Call_intensity"] = df["MOU"] / df["NB_J_VOIX"]
+    df["used_data"] = 0
+    df.loc[df["volume_data_in"] > 0, "used_data"] = 1
+    df["used_OM"] = 0
+    df.loc[df["OM_Montant"] > 0, "used_OM"] = 1
+    df["is_bi_service"] = 0
+    df.loc[(df["used_data"] == 1) & (df["used_OM"] == 1), "is_bi_service"] = 1
+    df["used_voice"] = 0
+    df.loc[df["Call_intensity"] > 0, "used_voice"] = 1
+    df["is_multi_service"] = 0
+    df.loc[(df["is_bi_service"] == 1) & (df["used_voice"] == 1), "is_multi_service"] = 1
+
+    def classe_arpu(x):
+        if x < 2000:
+            return "Weak_class"
+        elif x < 5000:
+            return "Average_class"
+        else:
+            return "Strong_class"
+
+    df["class_arpu"] = df["arpu_m2"].apply(classe_arpu)
+
+    def classe_data(x):
+        if x == 0:
+            return "None"
+        elif x < 500:
+            return "Weak"
+        elif x < 2000:
+            return "Average"
+        else:
+            return "Strong"
+
+    df["class_data"] = df["volume_data_in"].apply(classe_data)
+
+    df["variation"] = (df["arpu_m3"] - df["arpu_m2"]) / df["arpu_m2"]
+
+    def categorize_variation(x):
+        if x < -0.25:
+            return 'Strong decrease (<-25%)'
+        elif x < 0:
+            return 'Mild decrease (-25% to 0)'
+        elif x < 0.25:
+            return 'Stable (0% to 25%)'
+        else:
+            return 'Increase (>25%)'
+
+    df['variation_category'] = df['variation'].apply(categorize_variation)
+    return df
+
+
+# ============================================================
+# COMPARISON
+# ============================================================
+
+def compare(legacy, vectorized):
+    """Columns whose values differ between the two implementations"""
+    differing = []
+    for col in legacy.columns:
+        a = legacy[col]
+        b = vectorized[col]
+        if isinstance(b.dtype, pd.CategoricalDtype):
+            same = (a.astype(str).to_numpy() == b.astype(str).to_numpy()).all()
+        else:
+            same = np.allclose(a.to_numpy(dtype=np.float64), b.to_numpy(dtype=np.float64), equal_nan=True)
+        if not same:
+            differing.append(col)
+    return differing
+
+
+def run(rows, repeat=3):
+    panel = synthetic_panel(rows)
+    results = {}
+    for name, func in [('legacy', legacy_features), ('vectorized', build_features)]:
+        timings = []
+        for _ in range(repeat):
+            df = panel.copy()
+            start = time.perf_counter()
+            out = func(df)
+            timings.append(time.perf_counter() - start)
+        results[name] = {'seconds': min(timings), 'frame': out}
+
+    differing = compare(results['legacy']['frame'], results['vectorized']['frame'])
+    return {
+        'rows': rows,
+        'legacy_s': results['legacy']['seconds'],
+        'vectorized_s': results['vectorized']['seconds'],
+        'speedup': results['legacy']['seconds'] / results['vectorized']['seconds'],
+        'legacy_mb': results['legacy']['frame'].memory_usage(deep=True).sum() / 1e6,
+        'vectorized_mb': results['vectorized']['frame'].memory_usage(deep=True).sum() / 1e6,
+        'differing_columns': differing
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=850_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(args.rows, args.repeat)
+    print(f"Rows            : {result['rows']:,}")
+    print(f"Notebook cells  : {result['legacy_s']:.3f} s  ({result['legacy_mb']:.0f} MB)")
+    print(f"build_features  : {result['vectorized_s']:.3f} s  ({result['vectorized_mb']:.0f} MB)")
+    print(f"Speed-up        : x{result['speedup']:.1f}")
+    if result['differing_columns']:
+        raise SystemExit(f"Outputs differ on: {result['differing_columns']}")
+    print("Outputs identical")
+
+
+if __name__ == '__main__':
+    main()
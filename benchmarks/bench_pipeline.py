@@ -0,0 +1,227 @@
+"""
+Benchmark: every stage of the scoring and simulation path on synthetic
+monthly extracts (downsell.synthetic), at several sizes, with wall time and
+peak memory.
+
+Stages: CSV load of three months, ARPU panel, features, target encoding,
+predict_proba, decile tables, threshold sweep, and a cold run / rerun of
+frontend.py on the scored population.  Peak memory is the highest resident
+set size sampled during the stage, above the level at its start (so it
+includes NumPy, pandas and Arrow buffers); freed heap memory is returned to
+the OS before each stage so that it is not silently reused.  Each stage is
+run --repeat times; its median time and highest peak memory are kept.
+
+Results are compared with a saved baseline (benchmarks/baseline.json, recorded
+at 100k rows); the run fails when a stage is slower or uses more memory than
+the baseline by more than the tolerance.  The same check runs as an opt-in
+test: DOWNSELL_BENCH=1 python -m pytest tests/test_benchmark.py
+
+    python -m benchmarks.bench_pipeline --rows 100000 1000000 --save-baseline
+    python -m benchmarks.bench_pipeline --rows 100000 1000000 --tolerance 0.25
+"""
+import argparse
+import ctypes
+import ctypes.util
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from downsell.deciles import ScoreHistogram
+from downsell.encoding import TargetEncoder
+from downsell.features import CATEGORICAL_VARS, COL_KEEP, DATE_REFERENCE, build_features
+from downsell.loader import read_month
+from downsell.metrics import threshold_sweep
+from downsell.models import make_model
+from downsell.panel import build_panel
+from downsell.profiling import PeakMemory
+from downsell.score import predict_proba
+from downsell.score_index import build_score_index, decile_table
+from downsell.store import save_scored_population
+from downsell.synthetic import generate_months
+
+SIZES = [100_000, 1_000_000, 5_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+TOLERANCE = 0.25
+REPEAT = 3
+# Stages shorter than this vary by more than the tolerance from run to run
+# (load_csv at 100k rows: 0.35-0.45 s), so they only fail above it
+MIN_SECONDS = 0.5
+MIN_MB = 10
+FRONTEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend.py')
+
+
+# ============================================================
+# MEASUREMENT
+# ============================================================
+
+try:
+    _LIBC = ctypes.CDLL(ctypes.util.find_library('c'))
+    _LIBC.malloc_trim
+except (OSError, AttributeError, TypeError):
+    _LIBC = None
+
+
+def release_memory():
+    """Collect garbage and hand freed heap pages back to the OS (glibc)"""
+    gc.collect()
+    if _LIBC is not None:
+        _LIBC.malloc_trim(0)
+
+
+def measure(func, repeat=1):
+    """
+    (result of the last call, median seconds, highest peak MB) of repeated
+    calls; later calls may reuse memory pooled by the first one, so the
+    highest peak is kept rather than the median
+    """
+    seconds, mb = [], []
+    for _ in range(repeat):
+        result = None
+        release_memory()
+        with PeakMemory(interval=0.005) as memory:
+            start = time.perf_counter()
+            result = func()
+            seconds.append(time.perf_counter() - start)
+        mb.append(memory.mb)
+    return result, float(np.median(seconds)), max(mb)
+
+
+# ============================================================
+# STAGES
+# ============================================================
+
+def run_frontend(scores_path, repeat=REPEAT):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    def cold_run():
+        # the Streamlit caches outlive an app: clear them for a cold start
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        return AppTest.from_file(FRONTEND, default_timeout=600).run()
+
+    os.environ['DOWNSELL_SCORES_PATH'] = scores_path
+    app, cold_s, cold_mb = measure(cold_run, repeat)
+    if app.exception:
+        raise RuntimeError(f"frontend.py failed: {app.exception[0].value}")
+    _, rerun_s, rerun_mb = measure(app.run, repeat)
+    return {
+        'frontend_cold': {'seconds': cold_s, 'peak_mb': cold_mb},
+        'frontend_rerun': {'seconds': rerun_s, 'peak_mb': rerun_mb}
+    }
+
+
+def run(rows, workdir, frontend=True, repeat=REPEAT):
+    """Median time and peak memory of every stage for one size"""
+    paths = generate_months(rows, workdir)
+    results = {}
+
+    def stage(name, func):
+        result, seconds, mb = measure(func, repeat)
+        results[name] = {'seconds': seconds, 'peak_mb': mb}
+        return result
+
+    months = stage('load_csv', lambda: [read_month(p) for p in paths])
+    df = stage('panel', lambda: build_panel(
+        months[1], {'m3': (months[2], 'inner'), 'm1': (months[0], 'left')}, base_label='m2'))
+    del months
+    stage('features', lambda: build_features(df, DATE_REFERENCE))
+    stage('target_encoding', lambda: TargetEncoder(CATEGORICAL_VARS).fit_transform(df, df['down_sell']))
+
+    X = df[COL_KEEP].to_numpy(dtype=np.float32)
+    y = df['down_sell'].to_numpy()
+    del df
+    sample = slice(0, min(rows, 50_000))
+    model = make_model((y[sample] == 0).sum() / max((y[sample] == 1).sum(), 1), n_estimators=100)
+    model.fit(X[sample], y[sample])
+
+    scores = stage('predict_proba', lambda: predict_proba(model, X))
+    stage('decile_tables', lambda: (decile_table(build_score_index({'y_proba': scores, 'y_true': y})),
+                                    ScoreHistogram().update(scores, y).decile_stats()))
+    stage('threshold_sweep', lambda: threshold_sweep(y, scores, np.linspace(0, 1, 1001)))
+
+    if frontend:
+        scores_path = save_scored_population(os.path.join(workdir, 'scored_population'), scores, y,
+                                             ids=np.arange(len(y)))
+        results.update(run_frontend(scores_path, repeat))
+    return results
+
+
+# ============================================================
+# BASELINE
+# ============================================================
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """Stages slower or larger than the baseline by more than tolerance"""
+    found = []
+    for rows, stages in results.items():
+        for name, current in stages.items():
+            reference = baseline.get(rows, {}).get(name)
+            if reference is None:
+                continue
+            for metric, floor in [('seconds', MIN_SECONDS), ('peak_mb', MIN_MB)]:
+                limit = max(reference[metric], floor) * (1 + tolerance)
+                if current[metric] > limit:
+                    found.append(f"{rows} rows / {name}: {metric} {current[metric]:.2f} > {limit:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="allowed relative increase over the baseline (0.25 = +25%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="record this run as the new baseline")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="runs per stage (median time, highest peak memory)")
+    parser.add_argument('--no-frontend', action='store_true', help="skip the Streamlit runs")
+    parser.add_argument('--out', default=None, help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for rows in args.rows:
+        workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+        try:
+            results[str(rows)] = run(rows, workdir, frontend=not args.no_frontend, repeat=args.repeat)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        print(f"\n{rows:,} rows")
+        for name, r in results[str(rows)].items():
+            print(f"  {name:<16} {r['seconds']:8.3f} s {r['peak_mb']:9.1f} MB")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline saved: {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+    found = regressions(results, baseline, args.tolerance)
+    if found:
+        raise SystemExit("Performance regressions:\n  " + "\n  ".join(found))
+    print(f"\nNo regression beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+"""
+Down-sell scoring toolkit shared by the notebook and the Streamlit simulator.
+"""
@@ -0,0 +1,192 @@
+"""
+Budget-constrained allocation of several retention actions.
+
+Each customer gets at most one action (SMS, call, bonus offer, ...) so that
+the expected net benefit sum(p_i x eff_a x value_i - cost_a) is maximal
+under a campaign budget.
+
+The expected value of action a for customer i is e_i x eff_a with
+e_i = p_i x value_i, so the efficient actions (upper concave hull of
+(cost, effectiveness) through "no action") are the same for every
+customer, and moving customer i one step up that hull returns
+e_i x d_eff / d_cost per FCFA spent, in decreasing order along the hull.
+Taking these upgrades across the whole base by decreasing return until the
+budget is spent is the greedy solution of the LP relaxation (exact up to
+the last upgrade); it is one sort of n x n_actions values.
+
+    python -m downsell.allocation scores_mois3.parquet --budget 5000000 \\
+        --actions actions.json --out campaign.csv
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from downsell.export import write_target_list
+from downsell.store import down_weights, load_scored_population
+from downsell.value import VALUE_MONTHS
+
+# Illustrative catalogue: cost in FCFA, effectiveness = share of contacted
+# down-sellers retained
+DEFAULT_ACTIONS = [
+    {'name': 'SMS', 'cost': 50, 'effectiveness': 0.04},
+    {'name': 'Outbound call', 'cost': 250, 'effectiveness': 0.12},
+    {'name': 'Bonus offer', 'cost': 1000, 'effectiveness': 0.25}
+]
+
+
+def action_ladder(actions):
+    """
+    Positions of the efficient actions, by increasing cost: upper concave
+    hull of (cost, effectiveness) starting from no action at (0, 0)
+    """
+    order = sorted(range(len(actions)), key=lambda a: (actions[a]['cost'], -actions[a]['effectiveness']))
+    ladder = []
+    for a in order:
+        cost, eff = actions[a]['cost'], actions[a]['effectiveness']
+        # dominated by a cheaper action at least as effective
+        if ladder and eff <= actions[ladder[-1]]['effectiveness']:
+            continue
+        while ladder:
+            base_cost, base_eff = (actions[ladder[-2]]['cost'], actions[ladder[-2]]['effectiveness']) \
+                if len(ladder) >= 2 else (0, 0)
+            last = actions[ladder[-1]]
+            # drop the last action if it lies on or below the segment base -> a
+            if (last['effectiveness'] - base_eff) * (cost - base_cost) <= (eff - base_eff) * (last['cost'] - base_cost):
+                ladder.pop()
+            else:
+                break
+        ladder.append(a)
+    return ladder
+
+
+def allocate(y_proba, values, actions, budget):
+    """
+    Best action per customer under the budget.
+
+    values is the value of a retained customer: a scalar (flat value saved)
+    or one value per customer (e.g. months x ARPU).  Returns 'action'
+    (position in actions, -1 = not contacted), 'expected_gain' (expected net
+    benefit of that action) and 'spent'.
+    """
+    expected = np.asarray(y_proba, dtype=np.float64) * np.broadcast_to(
+        np.asarray(values, dtype=np.float64), np.shape(y_proba))
+    n = len(expected)
+    ladder = action_ladder(actions)
+
+    costs = np.array([0.0] + [actions[a]['cost'] for a in ladder])
+    effs = np.array([0.0] + [actions[a]['effectiveness'] for a in ladder])
+    step_cost = np.diff(costs)
+    step_return = np.diff(effs) / step_cost
+
+    # every (customer, step) upgrade with its return per FCFA; only upgrades
+    # returning more than they cost are worth taking
+    returns = expected[:, None] * step_return[None, :]
+    customer, step = np.nonzero(returns > 1)
+    # returns decrease along the ladder, so a customer's steps stay in order
+    order = np.argsort(-returns[customer, step])
+    customer, step = customer[order], step[order]
+
+    spent = np.cumsum(step_cost[step])
+    taken = int(np.searchsorted(spent, budget, side='right'))
+
+    level = np.zeros(n, dtype=np.int64)
+    np.maximum.at(level, customer[:taken], step[:taken] + 1)
+
+    action = np.full(n, -1, dtype=np.int64)
+    contacted = level > 0
+    action[contacted] = np.asarray(ladder, dtype=np.int64)[level[contacted] - 1]
+    return {
+        'action': action,
+        'expected_gain': expected * effs[level] - costs[level],
+        'spent': float(spent[taken - 1]) if taken else 0.0
+    }
+
+
+def allocation_summary(allocation, population, values, actions):
+    """
+    Per-action campaign figures (calculate_roi fields) plus a 'Total' row.
+    Retained customers and value use the labels when known, the scores
+    otherwise, as in the rest of the simulator.
+    """
+    action = allocation['action']
+    weights = np.asarray(down_weights(population), dtype=np.float64)
+    values = np.broadcast_to(np.asarray(values, dtype=np.float64), action.shape)
+
+    rows = []
+    for a, spec in enumerate(actions):
+        selected = action == a
+        clients = int(selected.sum())
+        expected_down = float(weights[selected].sum())
+        retained = expected_down * spec['effectiveness']
+        value = float((weights[selected] * values[selected]).sum()) * spec['effectiveness']
+        rows.append({
+            'action': spec['name'],
+            'clients': clients,
+            'expected_down': expected_down,
+            'total_cost': clients * spec['cost'],
+            'retained': retained,
+            'value_saved': value
+        })
+
+    table = pd.DataFrame(rows)
+    total = table.drop(columns='action').sum()
+    table = pd.concat([table, pd.DataFrame([{'action': 'Total', **total}])], ignore_index=True)
+    table['net_benefit'] = table['value_saved'] - table['total_cost']
+    table['roi'] = np.divide(table['net_benefit'] * 100, table['total_cost'],
+                             out=np.zeros(len(table)), where=table['total_cost'] > 0)
+    return table
+
+
+def allocation_targets(allocation, actions):
+    """
+    Contacted customers for the campaign tool, by decreasing expected gain:
+    (positions, {'action', 'expected_gain'}) for export.write_target_list
+    """
+    contacted = np.flatnonzero(allocation['action'] >= 0)
+    contacted = contacted[np.argsort(-allocation['expected_gain'][contacted], kind='stable')]
+    names = np.array([a['name'] for a in actions], dtype=object)
+    return contacted, {
+        'action': names[allocation['action'][contacted]],
+        'expected_gain': allocation['expected_gain'][contacted]
+    }
+
+
+def load_actions(path):
+    """Action catalogue from a JSON list of {'name', 'cost', 'effectiveness'}"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allocate retention actions under a campaign budget")
+    parser.add_argument('scores', help="scored population (store directory or Parquet)")
+    parser.add_argument('--budget', type=float, required=True, help="campaign budget (FCFA)")
+    parser.add_argument('--actions', default=None, help="JSON action catalogue (default: SMS / call / bonus offer)")
+    parser.add_argument('--value-saved', type=float, default=25000,
+                        help="flat value of a retained customer (FCFA), when the store has no ARPU")
+    parser.add_argument('--months', type=int, default=VALUE_MONTHS,
+                        help="months of ARPU saved per retained customer, when the store has ARPU")
+    parser.add_argument('--out', required=True, help="contacted customers (.csv, .csv.gz or .parquet)")
+    args = parser.parse_args()
+
+    actions = load_actions(args.actions) if args.actions else DEFAULT_ACTIONS
+    population = load_scored_population(args.scores)
+    values = args.value_saved if population['arpu'] is None else \
+        np.asarray(population['arpu'], dtype=np.float64) * args.months
+
+    start = time.perf_counter()
+    allocation = allocate(population['y_proba'], values, actions, args.budget)
+    elapsed = time.perf_counter() - start
+
+    positions, extra = allocation_targets(allocation, actions)
+    write_target_list(args.out, population, positions, extra)
+
+    print(allocation_summary(allocation, population, values, actions).round(1).to_string(index=False))
+    print(f"Allocated {allocation['spent']:,.0f} / {args.budget:,.0f} FCFA in {elapsed:.1f} s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Parquet cache for the monthly CSV extracts.
+
+Each extract is converted to Parquet once, stored as
+<cache_dir>/<file stem>/<content hash>.parquet, and reused by every later
+run for as long as the source file content is unchanged.  Reads only
+materialize the requested columns.
+"""
+import hashlib
+import json
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from downsell.loader import DATE_COLUMN, MONTH_SCHEMA, iter_month_chunks
+
+CACHE_DIR = os.environ.get('DOWNSELL_CACHE_DIR', '.parquet_cache')
+HASH_INDEX = 'hashes.json'
+
+CATEGORY_COLUMNS = [c for c, t in MONTH_SCHEMA.items() if t == 'category' and c != DATE_COLUMN]
+
+
+def file_hash(path, block_size=1 << 22):
+    """SHA-256 of the file content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cached_hash(path, cache_dir):
+    """
+    Content hash of path, remembered per (size, mtime) in the cache
+    directory so unchanged files are not re-read on every run
+    """
+    index_file = os.path.join(cache_dir, HASH_INDEX)
+    index = {}
+    if os.path.exists(index_file):
+        with open(index_file) as f:
+            index = json.load(f)
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = index.get(key)
+    if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha256']
+
+    digest = file_hash(path)
+    index[key] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': digest}
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(index_file, 'w') as f:
+        json.dump(index, f, indent=2)
+    return digest
+
+
+def _arrow_schema(columns):
+    # Categories are written as plain strings (Parquet dictionary-encodes
+    # them) so every chunk shares one schema
+    types = {'int64': pa.int64(), 'float64': pa.float64(), 'float32': pa.float32(),
+             'category': pa.string()}
+    return pa.schema([
+        (c, pa.timestamp('ns') if c == DATE_COLUMN else types[MONTH_SCHEMA[c]])
+        for c in columns
+    ])
+
+
+def _to_arrow(chunk, schema):
+    for col in chunk.select_dtypes(include='category').columns:
+        chunk[col] = chunk[col].astype(object)
+    return pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+
+
+def convert_month(path, target):
+    """Stream a CSV extract into a Parquet file, one row group per chunk"""
+    tmp = f"{target}.tmp"
+    writer = None
+    try:
+        for chunk in iter_month_chunks(path):
+            chunk = chunk[[c for c in MONTH_SCHEMA if c in chunk]]
+            if writer is None:
+                schema = _arrow_schema(chunk.columns)
+                writer = pq.ParquetWriter(tmp, schema, compression='zstd')
+            writer.write_table(_to_arrow(chunk, schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, target)
+    return target
+
+
+def cached_month_path(path, cache_dir=CACHE_DIR):
+    """Parquet file for a CSV extract, converted on first use"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target_dir = os.path.join(cache_dir, stem)
+    target = os.path.join(target_dir, f"{_cached_hash(path, cache_dir)}.parquet")
+    if not os.path.exists(target):
+        os.makedirs(target_dir, exist_ok=True)
+        convert_month(path, target)
+    return target
+
+
+def read_month_cached(path, columns=None, cache_dir=CACHE_DIR):
+    """
+    Same frame as loader.read_month, served from the Parquet cache.
+    Only `columns` are read from disk.
+    """
+    parquet_path = cached_month_path(path, cache_dir)
+    available = pq.read_schema(parquet_path).names
+    columns = available if columns is None else list(dict.fromkeys(columns))
+    table = pq.read_table(
+        parquet_path,
+        columns=columns,
+        read_dictionary=[c for c in CATEGORY_COLUMNS if c in columns]
+    )
+    return table.to_pandas()
@@ -0,0 +1,122 @@
+"""
+Segment aggregate cube of a scored population.
+
+One row per observed combination of region x handset bucket x
+seniority_class x class_arpu x service flags, holding the number of
+customers, down-sellers and the sum of scores.  The cube is built once per
+month (a few thousand rows instead of one per customer), so any segment
+filter and its ROI is a sum over a small table.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Customer columns aggregated in the cube
+SEGMENT_COLUMNS = [
+    'region_administrative', 'handset', 'seniority_class', 'class_arpu',
+    'used_data', 'used_OM', 'used_voice'
+]
+SERVICE_FLAGS = ['used_data', 'used_OM', 'used_voice']
+MEASURES = ['clients', 'downs', 'score_sum']
+
+# Handsets outside the most common ones are grouped as 'Other'
+TOP_HANDSETS = 20
+OTHER = 'Other'
+
+
+def cube_path(scores_path):
+    """Cube stored next to a scored population (inside a .npy store directory)"""
+    if str(scores_path).endswith('.parquet'):
+        return str(scores_path)[:-len('.parquet')] + '_cube.parquet'
+    return os.path.join(scores_path, 'cube.parquet')
+
+
+def _aggregate(frame, dims):
+    return (frame.groupby(dims, observed=True, sort=False)[MEASURES]
+                 .sum()
+                 .reset_index())
+
+
+def build_cube(df, scores, y_true=None):
+    """
+    Full-granularity cube (one handset per row) of customers df with their
+    scores.  Without labels, downs are the expected down-sellers (score sum).
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    frame = pd.DataFrame({
+        col: df[col].astype(str).astype('category') if col not in SERVICE_FLAGS
+        else np.asarray(df[col], dtype=np.int8)
+        for col in SEGMENT_COLUMNS
+    })
+    frame['clients'] = np.int64(1)
+    frame['downs'] = scores if y_true is None else np.asarray(y_true, dtype=np.float64)
+    frame['score_sum'] = scores
+    return _aggregate(frame, SEGMENT_COLUMNS)
+
+
+def merge_cubes(cubes):
+    """Sum cubes built on separate chunks of the same month"""
+    frame = pd.concat(cubes, ignore_index=True)
+    dims = [c for c in frame.columns if c not in MEASURES]
+    for col in dims:
+        if col not in SERVICE_FLAGS:
+            frame[col] = frame[col].astype(str).astype('category')
+    return _aggregate(frame, dims)
+
+
+def bucket_handsets(cube, top=TOP_HANDSETS):
+    """Keep the `top` handsets by number of customers, the rest as 'Other'"""
+    totals = cube.groupby('handset', observed=True)['clients'].sum()
+    kept = totals.nlargest(top).index.astype(str)
+    handset = cube['handset'].astype(str)
+    bucketed = cube.drop(columns='handset').assign(
+        handset_bucket=handset.where(handset.isin(kept), OTHER).astype('category')
+    )
+    dims = [c for c in bucketed.columns if c not in MEASURES]
+    return _aggregate(bucketed, dims)
+
+
+def save_cube(cube, path):
+    cube.to_parquet(path, index=False)
+    return path
+
+
+def load_cube(path):
+    return pd.read_parquet(path)
+
+
+# ============================================================
+# QUERIES
+# ============================================================
+
+def segment_mask(cube, filters):
+    """Rows of the cube matching filters (dimension -> allowed values; empty = all)"""
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, values in filters.items():
+        if values:
+            mask &= cube[dim].isin(list(values)).to_numpy()
+    return mask
+
+
+def segment_totals(cube, filters):
+    """clients, downs, down_rate and mean score of a segment"""
+    selected = cube.loc[segment_mask(cube, filters), MEASURES]
+    clients = int(selected['clients'].sum())
+    downs = float(selected['downs'].sum())
+    return {
+        'clients': clients,
+        'downs': downs,
+        'down_rate': downs / clients if clients else 0.0,
+        'mean_score': float(selected['score_sum'].sum()) / clients if clients else 0.0
+    }
+
+
+def segment_breakdown(cube, dim, filters):
+    """Per-value totals of one dimension within a segment, with down_rate and lift"""
+    selected = cube.loc[segment_mask(cube, filters)]
+    table = selected.groupby(dim, observed=True)[MEASURES].sum().reset_index()
+    table['down_rate'] = table['downs'] / table['clients']
+    overall = table['downs'].sum() / table['clients'].sum() if len(table) else 0.0
+    table['lift'] = table['down_rate'] / overall if overall else 0.0
+    return table.sort_values('down_rate', ascending=False, ignore_index=True)
@@ -0,0 +1,115 @@
+"""
+Streaming decile / lift / cumulative-gain tables.
+
+Scores are probabilities in [0, 1], so a fixed-bin histogram of clients and
+down-sellers per score bin is enough to rebuild the decile table: it is
+updated chunk by chunk, histograms from several workers are merged by
+addition, and no score vector is ever held or sorted as a whole.
+"""
+import numpy as np
+import pandas as pd
+
+N_BINS = 100_000
+
+
+class ScoreHistogram:
+    """
+    Clients and down-sellers per score bin.  Decile boundaries follow the
+    notebook convention (deciles 1-9 hold N // 10 clients, decile 10 the
+    rest); a bin straddling a boundary is split pro rata, so counts are
+    exact and down-seller counts are accurate to within one bin.
+    """
+
+    def __init__(self, n_bins=N_BINS):
+        self.n_bins = n_bins
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.downs = np.zeros(n_bins, dtype=np.float64)
+
+    def update(self, scores, y_true=None):
+        """
+        Add a chunk of scores.  Without labels the scores themselves are
+        counted as expected down-sellers.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        bins = np.clip((scores * self.n_bins).astype(np.int64), 0, self.n_bins - 1)
+        weights = scores if y_true is None else np.asarray(y_true, dtype=np.float64)
+        self.counts += np.bincount(bins, minlength=self.n_bins)
+        self.downs += np.bincount(bins, weights=weights, minlength=self.n_bins)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another histogram with the same binning"""
+        if other.n_bins != self.n_bins:
+            raise ValueError("Cannot merge histograms with different binning")
+        self.counts += other.counts
+        self.downs += other.downs
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def _cumulative(self):
+        """Cumulative clients / downs from the highest score bin down"""
+        cum_counts = np.concatenate(([0], np.cumsum(self.counts[::-1])))
+        cum_downs = np.concatenate(([0.0], np.cumsum(self.downs[::-1])))
+        return cum_counts, cum_downs
+
+    def downs_in_top(self, k):
+        """Down-sellers among the k best-scored clients (k may be an array)"""
+        cum_counts, cum_downs = self._cumulative()
+        return np.interp(k, cum_counts, cum_downs)
+
+    def decile_edges(self):
+        """Lowest score of deciles 1..9 (approximate to one bin width)"""
+        cum_counts, _ = self._cumulative()
+        n = self.total
+        bounds = np.arange(1, 10) * (n // 10)
+        top_edges = np.arange(self.n_bins, -1, -1) / self.n_bins
+        return np.interp(bounds, cum_counts, top_edges)
+
+    def decile_stats(self):
+        """
+        Notebook decile_stats table: decile, n_clients, n_downsell, ds_rate,
+        lift, pct_ds_captured, pct_population
+        """
+        n = self.total
+        size = max(n // 10, 1)
+        bounds = np.minimum(np.arange(11) * size, n)
+        bounds[-1] = n
+
+        cum_downs = self.downs_in_top(bounds)
+        n_clients = np.diff(bounds)
+        n_downsell = np.diff(cum_downs)
+        ds_rate = np.divide(n_downsell, n_clients, out=np.zeros(10), where=n_clients > 0)
+        total_downs = cum_downs[-1]
+        overall_rate = total_downs / n if n else 0.0
+
+        return pd.DataFrame({
+            'decile': np.arange(1, 11),
+            'n_clients': n_clients,
+            'n_downsell': n_downsell,
+            'ds_rate': ds_rate,
+            'lift': ds_rate / overall_rate if overall_rate else np.zeros(10),
+            'pct_ds_captured': cum_downs[1:] / total_downs * 100 if total_downs else np.zeros(10),
+            'pct_population': bounds[1:] / n * 100 if n else np.zeros(10)
+        })
+
+    def gain_curve(self, n_points=100):
+        """Cumulative gain: % of down-sellers captured vs % of population targeted"""
+        n = self.total
+        pct_population = np.linspace(0, 100, n_points + 1)
+        cum_downs = self.downs_in_top(pct_population / 100 * n)
+        total_downs = cum_downs[-1]
+        return pd.DataFrame({
+            'pct_population': pct_population,
+            'pct_ds_captured': cum_downs / total_downs * 100 if total_downs else 0.0
+        })
+
+
+def decile_stats(chunks, n_bins=N_BINS):
+    """Decile table from an iterable of (scores, y_true) chunks"""
+    hist = ScoreHistogram(n_bins)
+    for scores, y_true in chunks:
+        hist.update(scores, y_true)
+    return hist.decile_stats()
@@ -0,0 +1,229 @@
+"""
+Feature and score drift of a monthly extract against the training reference.
+
+The reference profile stores, for every col_keep feature and for the model
+score, bin edges taken from the training quantiles and the training counts
+per bin.  A new extract is streamed once in chunks (features built and
+scored as in downsell.score); each chunk only adds to fixed-bin counts, so
+the whole base is never held in memory.  From the counts:
+
+  * PSI (population stability index) over the 10 reference deciles;
+  * KS, the largest gap between the reference and new CDFs over the
+    100 reference percentiles (a lower bound of the exact statistic).
+
+    python -m downsell.drift mois3.csv --previous mois2.csv \\
+        --reference models/drift_reference.json --out models/drift_report.json
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from downsell.encoding import TargetEncoder
+from downsell.features import COL_KEEP
+from downsell.loader import CHUNK_SIZE, MODEL_COLUMNS, iter_month_chunks, read_month
+from downsell.models import load_date_reference, load_model
+from downsell.score import feature_matrix, predict_proba
+
+REFERENCE_PATH = 'models/drift_reference.json'
+REPORT_PATH = 'models/drift_report.json'
+SCORE = 'score'
+
+PSI_BINS = 10
+KS_BINS = 100
+# Usual PSI reading: < 0.1 stable, 0.1 - 0.25 moderate shift, > 0.25 major shift
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+EPSILON = 1e-4
+
+
+# ============================================================
+# FIXED-BIN COUNTS
+# ============================================================
+
+def quantile_edges(values, bins):
+    """Inner bin edges at the quantiles of values (duplicates removed)"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.unique(np.quantile(values, np.arange(1, bins) / bins))
+
+
+def bin_counts(values, edges):
+    """Counts per bin; bin i holds edges[i-1] <= x < edges[i] (open ends)"""
+    bins = np.searchsorted(edges, np.asarray(values, dtype=np.float64), side='right')
+    return np.bincount(bins, minlength=len(edges) + 1)
+
+
+def _columns(X, scores):
+    """Monitored columns of a feature matrix (col_keep order) and scores"""
+    X = np.asarray(X)
+    columns = {name: X[:, j] for j, name in enumerate(COL_KEEP)}
+    columns[SCORE] = np.asarray(scores)
+    return columns
+
+
+class DriftCounts:
+    """Per-column counts on the reference bins, filled chunk by chunk"""
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.psi = {name: np.zeros(len(r['psi_edges']) + 1, dtype=np.int64)
+                    for name, r in reference['columns'].items()}
+        self.ks = {name: np.zeros(len(r['ks_edges']) + 1, dtype=np.int64)
+                   for name, r in reference['columns'].items()}
+        self.n = 0
+
+    def update(self, X, scores):
+        """Add a chunk: X in col_keep order and its scores"""
+        for name, values in _columns(X, scores).items():
+            column = self.reference['columns'][name]
+            self.psi[name] += bin_counts(values, column['psi_edges'])
+            self.ks[name] += bin_counts(values, column['ks_edges'])
+        self.n += len(scores)
+        return self
+
+
+# ============================================================
+# REFERENCE PROFILE
+# ============================================================
+
+def build_reference(X, scores, psi_bins=PSI_BINS, ks_bins=KS_BINS):
+    """Reference profile of the training features (col_keep order) and scores"""
+    columns = {}
+    for name, values in _columns(X, scores).items():
+        psi_edges = quantile_edges(values, psi_bins)
+        ks_edges = quantile_edges(values, ks_bins)
+        columns[name] = {
+            'psi_edges': psi_edges.tolist(),
+            'psi_counts': bin_counts(values, psi_edges).tolist(),
+            'ks_edges': ks_edges.tolist(),
+            'ks_counts': bin_counts(values, ks_edges).tolist()
+        }
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'n': int(len(scores)),
+        'columns': columns
+    }
+
+
+def save_json(obj, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(obj, f, indent=2)
+    return path
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# ============================================================
+# STATISTICS
+# ============================================================
+
+def psi(reference_counts, new_counts, epsilon=EPSILON):
+    """Population stability index between two count vectors on the same bins"""
+    ref = np.asarray(reference_counts, dtype=np.float64)
+    new = np.asarray(new_counts, dtype=np.float64)
+    ref = np.maximum(ref / max(ref.sum(), 1), epsilon)
+    new = np.maximum(new / max(new.sum(), 1), epsilon)
+    return float(np.sum((new - ref) * np.log(new / ref)))
+
+
+def ks_statistic(reference_counts, new_counts):
+    """Largest CDF gap at the bin edges"""
+    ref = np.cumsum(reference_counts) / max(np.sum(reference_counts), 1)
+    new = np.cumsum(new_counts) / max(np.sum(new_counts), 1)
+    return float(np.max(np.abs(ref - new)))
+
+
+def drift_status(value):
+    if value >= PSI_ALERT:
+        return 'alert'
+    if value >= PSI_WARNING:
+        return 'warning'
+    return 'stable'
+
+
+def drift_report(counts, label=None):
+    """PSI / KS of every monitored column: report dict (rows sorted by PSI)"""
+    rows = []
+    for name, column in counts.reference['columns'].items():
+        value = psi(column['psi_counts'], counts.psi[name])
+        rows.append({
+            'column': name,
+            'psi': value,
+            'ks': ks_statistic(column['ks_counts'], counts.ks[name]),
+            'status': drift_status(value)
+        })
+    rows.sort(key=lambda r: r['psi'], reverse=True)
+    return {
+        'label': label,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'n_reference': counts.reference['n'],
+        'n': counts.n,
+        'columns': rows
+    }
+
+
+def report_frame(report):
+    """Report rows as a DataFrame: column, psi, ks, status"""
+    return pd.DataFrame(report['columns'], columns=['column', 'psi', 'ks', 'status'])
+
+
+# ============================================================
+# MONTHLY PASS
+# ============================================================
+
+def monitor_month(path, previous_path, model_path, encoder_path, reference_path=REFERENCE_PATH,
+                  date_reference=None, chunksize=CHUNK_SIZE, n_threads=os.cpu_count(), label=None):
+    """One chunked pass over a monthly extract; returns the drift report"""
+    model = load_model(model_path)
+    encoder = TargetEncoder.load(encoder_path)
+    previous = read_month(previous_path, columns=['ID', 'arpu'])
+    counts = DriftCounts(load_json(reference_path))
+
+    if date_reference is None:
+        # seniority on the scale of the training reference
+        date_reference = load_date_reference(model_path)
+
+    for chunk in iter_month_chunks(path, MODEL_COLUMNS, chunksize):
+        X = feature_matrix(chunk, previous, encoder, date_reference)
+        counts.update(X, predict_proba(model, X, n_threads))
+
+    return drift_report(counts, label or os.path.basename(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PSI / KS drift of a monthly extract against the training reference")
+    parser.add_argument('month', help="monthly extract to check (CSV, ';'-separated)")
+    parser.add_argument('--previous', required=True, help="previous month extract (for variation_m1_m2)")
+    parser.add_argument('--model', default='models/xgb_model.json')
+    parser.add_argument('--encoder', default='models/target_encoder.npz')
+    parser.add_argument('--reference', default=REFERENCE_PATH)
+    parser.add_argument('--out', default=REPORT_PATH)
+    parser.add_argument('--label', default=None, help="month label shown in the report")
+    parser.add_argument('--date-reference', default=None,
+                        help="date used for seniority_days (default: the training date saved with the model)")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = monitor_month(
+        args.month, args.previous, args.model, args.encoder, args.reference,
+        date_reference=args.date_reference, chunksize=args.chunksize,
+        n_threads=args.threads, label=args.label
+    )
+    save_json(report, args.out)
+
+    print(report_frame(report).round(4).to_string(index=False))
+    print(f"{report['n']:,} customers checked in {time.perf_counter() - start:.1f} s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Campaign economics: cost, retained customers, net benefit and ROI.
+"""
+import numpy as np
+import pandas as pd
+
+ROI_FIELDS = ['clients', 'expected_down', 'total_cost', 'retained',
+              'value_saved', 'net_benefit', 'roi']
+
+
+def calculate_roi(clients, down_rate, cost_per_action, value_saved, effectiveness):
+    """
+    Calculate ROI for a given segment
+    """
+    expected_down = clients * down_rate
+    total_cost = clients * cost_per_action
+    retained = expected_down * effectiveness
+    value = retained * value_saved
+    net_benefit = value - total_cost
+    roi = (net_benefit / total_cost * 100) if total_cost > 0 else 0
+
+    return {
+        'clients': clients,
+        'expected_down': expected_down,
+        'total_cost': total_cost,
+        'retained': retained,
+        'value_saved': value,
+        'net_benefit': net_benefit,
+        'roi': roi
+    }
+
+
+def calculate_roi_grid(clients, down_rate, cost_per_action, value_saved,
+                       effectiveness, as_frame=False):
+    """
+    Batched calculate_roi over whole parameter grids.
+
+    Every argument may be a scalar or an array; they are broadcast together
+    (e.g. eff[:, None, None], cost[None, :, None], value[None, None, :] for
+    a sensitivity cube).  Returns a structured array with the calculate_roi
+    fields in the broadcast shape, or a flat DataFrame when as_frame=True.
+    """
+    clients, down_rate, cost, value, eff = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.float64)
+          for a in (clients, down_rate, cost_per_action, value_saved, effectiveness))
+    )
+
+    out = np.empty(clients.shape, dtype=[(f, np.float64) for f in ROI_FIELDS])
+    out['clients'] = clients
+    np.multiply(clients, down_rate, out=out['expected_down'])
+    np.multiply(clients, cost, out=out['total_cost'])
+    np.multiply(out['expected_down'], eff, out=out['retained'])
+    np.multiply(out['retained'], value, out=out['value_saved'])
+    np.subtract(out['value_saved'], out['total_cost'], out=out['net_benefit'])
+
+    total_cost = out['total_cost']
+    out['roi'] = 0.0
+    np.divide(out['net_benefit'] * 100, total_cost, out=out['roi'], where=total_cost > 0)
+
+    if as_frame:
+        return pd.DataFrame(out.ravel())
+    return out
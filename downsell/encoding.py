@@ -0,0 +1,118 @@
+"""
+Target encoding of categorical variables (handset, region, classes...).
+
+The encoder is fitted on training labels only and stores, per column, the
+sorted category labels and their smoothed down-sell rate.  Encoding new data
+is a category-code lookup followed by one array take, so monthly scoring
+never re-runs a groupby over historical labels.
+"""
+import numpy as np
+import pandas as pd
+
+
+class TargetEncoder:
+    """
+    Smoothed target encoder: rate(c) = (downs_c + m * prior) / (n_c + m),
+    with m = smoothing and prior = global down-sell rate of the training
+    data.  Unseen or missing categories get the prior.
+    """
+
+    def __init__(self, columns, smoothing=20.0, suffix='_enc'):
+        self.columns = list(columns)
+        self.smoothing = float(smoothing)
+        self.suffix = suffix
+        self.prior_ = None
+        self.categories_ = {}
+        self.rates_ = {}
+
+    # ------------------------------------------------------------
+    # Fitting
+    # ------------------------------------------------------------
+
+    def _fit_column(self, values, y):
+        codes, categories = pd.factorize(values, sort=True)
+        seen = codes >= 0
+        counts = np.bincount(codes[seen], minlength=len(categories))
+        downs = np.bincount(codes[seen], weights=y[seen], minlength=len(categories))
+        rates = (downs + self.smoothing * self.prior_) / np.maximum(counts + self.smoothing, 1e-12)
+        return np.asarray(categories.astype(str), dtype=str), rates.astype(np.float32)
+
+    def fit(self, df, y):
+        """Learn one lookup table per column from training rows"""
+        y = np.asarray(y, dtype=np.float64)
+        self.prior_ = float(y.mean())
+        for col in self.columns:
+            self.categories_[col], self.rates_[col] = self._fit_column(df[col], y)
+        return self
+
+    # ------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------
+
+    def encode(self, values, col):
+        """Encoded rates for one column (float32 array)"""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # map the (few) category labels, then the codes
+            mapping = pd.Index(self.categories_[col]).get_indexer(values.cat.categories.astype(str))
+            value_codes = values.cat.codes.to_numpy()
+            codes = np.where(value_codes >= 0, mapping[value_codes], -1)
+        else:
+            codes = pd.Categorical(values, categories=self.categories_[col]).codes
+        # last slot holds the prior for unseen / missing categories (code -1)
+        lookup = np.append(self.rates_[col], np.float32(self.prior_))
+        return lookup.take(codes)
+
+    def transform(self, df, columns=None):
+        """Add a <col>_enc column for each encoded column, or only `columns` (in place)"""
+        for col in self.columns if columns is None else columns:
+            df[col + self.suffix] = self.encode(df[col], col)
+        return df
+
+    def fit_transform(self, df, y, n_folds=5, random_state=42):
+        """
+        Fit on all rows, but encode each training row with tables fitted on
+        the other folds so the row's own label never leaks into its feature
+        """
+        y = np.asarray(y, dtype=np.float64)
+        self.fit(df, y)
+
+        folds = np.random.default_rng(random_state).integers(0, n_folds, len(df))
+        encoded = {col: np.empty(len(df), dtype=np.float32) for col in self.columns}
+        for k in range(n_folds):
+            held_out = folds == k
+            fold_encoder = TargetEncoder(self.columns, self.smoothing, self.suffix)
+            fold_encoder.fit(df.loc[~held_out], y[~held_out])
+            for col in self.columns:
+                encoded[col][held_out] = fold_encoder.encode(df.loc[held_out, col], col)
+
+        for col in self.columns:
+            df[col + self.suffix] = encoded[col]
+        return df
+
+    # ------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------
+
+    def save(self, path):
+        """Write the lookup tables to a .npz file (no pickle)"""
+        arrays = {
+            '__columns__': np.asarray(self.columns, dtype=str),
+            '__params__': np.asarray([self.smoothing, self.prior_], dtype=np.float64),
+            '__suffix__': np.asarray(self.suffix, dtype=str),
+        }
+        for i, col in enumerate(self.columns):
+            arrays[f"categories_{i}"] = self.categories_[col]
+            arrays[f"rates_{i}"] = self.rates_[col]
+        np.savez_compressed(path, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            smoothing, prior = f['__params__']
+            encoder = cls(f['__columns__'].tolist(), smoothing, str(f['__suffix__']))
+            encoder.prior_ = float(prior)
+            for i, col in enumerate(encoder.columns):
+                encoder.categories_[col] = f[f"categories_{i}"]
+                encoder.rates_[col] = f[f"rates_{i}"]
+        return encoder
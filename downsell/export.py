@@ -0,0 +1,91 @@
+"""
+Streamed export of campaign target lists.
+
+A target list (hundreds of thousands of customers) is written chunk by
+chunk from the scored store to CSV, gzip-compressed CSV or Parquet, so it
+is never held as one in-memory frame or string.  The format follows the
+file extension: .csv, .csv.gz or .parquet.  Each Streamlit session writes
+to its own directory under the export directory; cleanup_exports removes
+the directories of sessions idle for longer than a given age.
+"""
+import gzip
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK = 1 << 18
+EXPORT_FORMATS = {'CSV': '.csv', 'CSV (gzip)': '.csv.gz', 'Parquet': '.parquet'}
+
+
+def _frames(population, positions, extra, chunk):
+    """Target list as DataFrame chunks: rank, ID, score and extra columns"""
+    ids = population['ID']
+    scores = population['y_proba']
+    extra = extra or {}
+    for start in range(0, len(positions), chunk):
+        part = np.asarray(positions[start:start + chunk])
+        frame = pd.DataFrame({
+            'rank': np.arange(start + 1, start + len(part) + 1, dtype=np.int64),
+            'ID': part if ids is None else np.asarray(ids[part]),
+            'score': np.asarray(scores[part], dtype=np.float32)
+        })
+        for name, values in extra.items():
+            frame[name] = np.asarray(values[start:start + chunk])
+        yield frame
+
+
+def write_target_list(path, population, positions, extra=None, chunk=EXPORT_CHUNK):
+    """
+    Write the customers at `positions` of a scored population (in that
+    order) to path.  extra maps column names to arrays aligned with
+    positions (e.g. the action of each customer).  Returns the row count.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    path = str(path)
+
+    if path.endswith('.parquet'):
+        writer = None
+        try:
+            for frame in _frames(population, positions, extra, chunk):
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            # empty target list: schema-only file
+            pd.DataFrame(columns=['rank', 'ID', 'score', *(extra or {})]).to_parquet(path, index=False)
+        return len(positions)
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', newline='') as f:
+        header = True
+        for frame in _frames(population, positions, extra, chunk):
+            frame.to_csv(f, index=False, header=header)
+            header = False
+        if header:
+            f.write(','.join(['rank', 'ID', 'score', *(extra or {})]) + '\n')
+    return len(positions)
+
+
+def cleanup_exports(export_dir, max_age, now=None):
+    """
+    Delete the session directories of export_dir whose files were last
+    written more than max_age seconds ago.  Returns the removed paths.
+    """
+    now = time.time() if now is None else now
+    removed = []
+    if not os.path.isdir(export_dir):
+        return removed
+    for entry in os.scandir(export_dir):
+        if entry.is_dir(follow_symlinks=False) and now - entry.stat().st_mtime > max_age:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed.append(entry.path)
+    return removed
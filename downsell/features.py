@@ -0,0 +1,135 @@
+"""
+Feature engineering for the down-sell model.
+
+Vectorized version of the notebook feature cells (variation M1-M2,
+seniority, usage ratios, service flags, business classes): NumPy
+conditions instead of row-wise Series.apply, int8 flags and categorical
+classes instead of int64 / object columns.
+"""
+import numpy as np
+import pandas as pd
+
+DATE_REFERENCE = '2025-11-30'  # last day of M2
+
+# Model features (notebook col_keep)
+COL_KEEP = [
+    "arpu_m2", "arpu_voix",
+    "MOU", "nb_j_data", "volume_data_in", "nb_jr_activite",
+    "OM_Montant", "OM_nb_jr_activite",
+    "used_data", "used_voice", "is_multi_service", "NB_J_VOIX",
+    "seniority_days", "handset_enc", "region_administrative_enc",
+    "class_arpu_enc", "seniority_class_enc",
+    "variation_m1_m2"
+]
+
+# Categorical variables target-encoded into *_enc columns
+CATEGORICAL_VARS = [
+    'seniority_class', 'handset', 'class_arpu', 'region_administrative',
+    'class_data', 'class_variation_m1_m2', 'variation_category'
+]
+
+SENIORITY_CLASSES = ["Unknowned", "Recent", "Medium", "Established", "Loyal"]
+ARPU_CLASSES = ["Weak_class", "Average_class", "Strong_class"]
+DATA_CLASSES = ["None", "Weak", "Average", "Strong"]
+VARIATION_M1_M2_CLASSES = ["Declining", "Unchanged", "Growing", "Inconnue"]
+VARIATION_CATEGORIES = [
+    'Strong decrease (<-25%)', 'Mild decrease (-25% to 0)',
+    'Stable (0% to 25%)', 'Increase (>25%)'
+]
+
+
+def _classes(conditions, labels):
+    """
+    Categorical column from ordered conditions; rows matching none of them
+    get the last label (same fall-through as the notebook if/elif chains)
+    """
+    codes = np.select(conditions, np.arange(len(conditions), dtype=np.int8),
+                      default=len(labels) - 1).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def _safe_ratio(num, den):
+    """num / den where den > 0, else 0"""
+    num = np.asarray(num, dtype=np.float64)
+    den = np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros(len(num)), where=den > 0)
+
+
+def variation_features(df):
+    """arpu_m1 NaN -> 0, variation_m1_m2 and class_variation_m1_m2"""
+    df['arpu_m1'] = df['arpu_m1'].fillna(0)
+    variation = _safe_ratio(df['arpu_m2'].to_numpy() - df['arpu_m1'].to_numpy(), df['arpu_m1'])
+    df['variation_m1_m2'] = variation
+    df['class_variation_m1_m2'] = _classes(
+        [variation < -0.25, variation <= 0.25, variation > 0.25],
+        VARIATION_M1_M2_CLASSES
+    )
+    return df
+
+
+def seniority_features(df, date_reference=DATE_REFERENCE):
+    """seniority_days (-1 when the activation date is unknown) and seniority_class"""
+    days = (pd.Timestamp(date_reference) - df['DATE_ACTIVATION']).dt.days
+    days = days.fillna(-1).to_numpy(dtype=np.int32)
+    df['seniority_days'] = days
+    df['seniority_class'] = _classes(
+        [days == -1, days < 90, days < 270, days < 1080],
+        SENIORITY_CLASSES
+    )
+    return df
+
+
+def usage_features(df):
+    """Ratios, service flags and ARPU / data classes"""
+    arpu_m2 = df['arpu_m2'].to_numpy()
+    volume = df['volume_data_in'].to_numpy()
+
+    if 'arpu_data' in df:
+        df['part_data'] = _safe_ratio(df['arpu_data'], arpu_m2)
+    call_intensity = _safe_ratio(df['MOU'], df['NB_J_VOIX'])
+    df['Call_intensity'] = call_intensity
+
+    used_data = volume > 0
+    used_om = df['OM_Montant'].to_numpy() > 0
+    used_voice = call_intensity > 0
+    is_bi_service = used_data & used_om
+
+    df['used_data'] = used_data.astype(np.int8)
+    df['used_OM'] = used_om.astype(np.int8)
+    df['is_bi_service'] = is_bi_service.astype(np.int8)
+    df['used_voice'] = used_voice.astype(np.int8)
+    df['is_multi_service'] = (is_bi_service & used_voice).astype(np.int8)
+
+    df['class_arpu'] = _classes([arpu_m2 < 2000, arpu_m2 < 5000], ARPU_CLASSES)
+    df['class_data'] = _classes([volume == 0, volume < 500, volume < 2000], DATA_CLASSES)
+    return df
+
+
+def target_features(df):
+    """down_sell target and M2 -> M3 variation category (needs arpu_m3)"""
+    arpu_m2 = df['arpu_m2'].to_numpy(dtype=np.float64)
+    arpu_m3 = df['arpu_m3'].to_numpy(dtype=np.float64)
+    df['down_sell'] = (arpu_m3 <= 0.75 * arpu_m2).astype(np.int8)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variation = (arpu_m3 - arpu_m2) / arpu_m2
+    df['variation'] = variation
+    df['variation_category'] = _classes(
+        [variation < -0.25, variation < 0, variation < 0.25],
+        VARIATION_CATEGORIES
+    )
+    return df
+
+
+def build_features(df, date_reference=DATE_REFERENCE):
+    """
+    Whole feature step on an M1/M2/M3 panel (see panel.build_panel), in
+    place.  The target columns are only added when arpu_m3 is present, so
+    the same function serves monthly scoring.
+    """
+    variation_features(df)
+    seniority_features(df, date_reference)
+    usage_features(df)
+    if 'arpu_m3' in df:
+        target_features(df)
+    return df
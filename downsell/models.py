@@ -0,0 +1,117 @@
+"""
+Down-sell classifier: notebook configuration and persistence.
+
+XGBoost is used when installed, with scikit-learn's
+GradientBoostingClassifier as fallback (same rule as the notebook).
+
+The seniority reference date of the training data is stored next to the
+model (<model>.meta.json), so scoring, drift monitoring and retraining
+compute seniority_days on the scale the model was fitted with.
+"""
+import json
+import os
+
+try:
+    from xgboost import XGBClassifier
+    XGBOOST_AVAILABLE = True
+except ImportError:
+    from sklearn.ensemble import GradientBoostingClassifier
+    XGBOOST_AVAILABLE = False
+
+# Notebook cell 54
+XGB_PARAMS = dict(
+    n_estimators=400,
+    max_depth=6,
+    learning_rate=0.05,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    min_child_weight=15,
+    gamma=0.1,
+    reg_alpha=0.1,
+    reg_lambda=2.0,
+    eval_metric='auc',
+    random_state=42,
+    n_jobs=-1,
+    verbosity=0
+)
+
+GB_PARAMS = dict(
+    n_estimators=200,
+    max_depth=5,
+    learning_rate=0.05,
+    subsample=0.8,
+    random_state=42
+)
+
+# Notebook cells 50 and 53
+LR_PARAMS = dict(
+    class_weight='balanced',
+    max_iter=1000,
+    solver='lbfgs',
+    C=0.5,
+    random_state=42
+)
+
+RF_PARAMS = dict(
+    n_estimators=300,
+    max_depth=15,
+    min_samples_leaf=20,
+    min_samples_split=15,
+    max_features='sqrt',
+    class_weight='balanced',
+    random_state=42,
+    n_jobs=-1
+)
+
+
+def make_model(scale_pos_weight=1.0, **params):
+    """
+    XGBClassifier with the notebook parameters (or the GradientBoosting
+    fallback, which keeps only the params it accepts, so XGBoost-tuned
+    configurations still load)
+    """
+    if XGBOOST_AVAILABLE:
+        return XGBClassifier(**{**XGB_PARAMS, 'scale_pos_weight': scale_pos_weight, **params})
+    accepted = GradientBoostingClassifier().get_params()
+    return GradientBoostingClassifier(**{**GB_PARAMS, **{k: v for k, v in params.items() if k in accepted}})
+
+
+def metadata_path(path):
+    return os.path.splitext(path)[0] + '.meta.json'
+
+
+def save_model(model, path, date_reference=None):
+    """
+    XGBoost models are saved in their native JSON/UBJ format,
+    other estimators with joblib; date_reference (seniority reference date
+    of the training data) goes to <model>.meta.json
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if hasattr(model, 'save_model'):
+        model.save_model(path)
+    else:
+        import joblib
+        joblib.dump(model, path)
+    if date_reference is not None:
+        with open(metadata_path(path), 'w') as f:
+            json.dump({'date_reference': str(date_reference)}, f, indent=2)
+    return path
+
+
+def load_date_reference(path):
+    """Seniority reference date of a saved model (the notebook date when not recorded)"""
+    from downsell.features import DATE_REFERENCE
+    if not os.path.exists(metadata_path(path)):
+        return DATE_REFERENCE
+    with open(metadata_path(path)) as f:
+        return json.load(f)['date_reference']
+
+
+def load_model(path):
+    """Inverse of save_model, dispatching on the file extension"""
+    if path.endswith(('.json', '.ubj')):
+        model = XGBClassifier()
+        model.load_model(path)
+        return model
+    import joblib
+    return joblib.load(path)
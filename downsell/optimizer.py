@@ -0,0 +1,121 @@
+"""
+ROI-optimal targeting solver.
+
+Works from a gain curve precomputed once per scored population
+(cumulative down-sellers at a fixed set of top-K cut points), so finding
+the best cutoff or drawing a sensitivity surface never re-scans customers.
+"""
+import numpy as np
+
+from downsell.economics import calculate_roi, calculate_roi_grid
+
+GAIN_CURVE_POINTS = 2000
+
+
+def build_gain_curve(index, n_points=GAIN_CURVE_POINTS):
+    """
+    Gain curve sampled at n_points top-K cuts from a score index.
+
+    Also keeps the upper concave hull of the curve: the net benefit
+    D(k) * eff * value - k * cost is linear in (k, D(k)), so its maximum
+    always lies on a hull vertex.
+    """
+    n = index['n']
+    k = np.unique(np.linspace(0, n, n_points + 1).round().astype(np.int64))
+    downs = index['cum_downs'][k]
+    threshold = np.where(k > 0, -index['keys'][np.maximum(k - 1, 0)], 1.0)
+
+    hull = _upper_hull(k.astype(np.float64), downs)
+    slopes = np.diff(downs[hull]) / np.diff(k[hull])
+
+    return {
+        'n': n,
+        'k': k,
+        'downs': downs,
+        'threshold': threshold,
+        'hull': hull,
+        'hull_slopes': slopes
+    }
+
+
+def _upper_hull(x, y):
+    """Indices of the upper concave hull of points sorted by x"""
+    hull = []
+    for i in range(len(x)):
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            # drop b if it lies on or below the segment a -> i
+            if (y[b] - y[a]) * (x[i] - x[a]) <= (y[i] - y[a]) * (x[b] - x[a]):
+                hull.pop()
+            else:
+                break
+        hull.append(i)
+    return np.asarray(hull, dtype=np.int64)
+
+
+def _cut(curve, i, action_cost, value_saved, effectiveness):
+    k = int(curve['k'][i])
+    downs = float(curve['downs'][i])
+    result = calculate_roi(k, downs / k if k else 0.0, action_cost, value_saved, effectiveness)
+    result.update({
+        'threshold': float(curve['threshold'][i]),
+        'targeted_downs': downs,
+        'pct_clients': k / curve['n'] * 100 if curve['n'] else 0.0
+    })
+    return result
+
+
+def best_net_benefit_index(curve, action_cost, value_saved, effectiveness):
+    """
+    Position in the gain curve maximizing net benefit.
+
+    Contacting more customers pays off while the marginal down-sell rate
+    on the hull stays above action_cost / (effectiveness * value_saved);
+    the hull slopes are decreasing, so this is a binary search.  Works on
+    broadcast arrays of parameters too.
+    """
+    ratio = np.asarray(action_cost, dtype=np.float64) / (
+        np.asarray(effectiveness, dtype=np.float64) * np.asarray(value_saved, dtype=np.float64))
+    n_segments = np.searchsorted(-curve['hull_slopes'], -ratio, side='left')
+    return curve['hull'][n_segments]
+
+
+def optimal_cutoffs(curve, action_cost, value_saved, effectiveness, min_clients=1):
+    """
+    The two cutoffs for the current economic parameters:
+    'max_net_benefit' and 'max_roi' (among cuts of at least min_clients,
+    since ROI alone always favours the smallest target)
+    """
+    i_net = int(best_net_benefit_index(curve, action_cost, value_saved, effectiveness))
+
+    k = curve['k']
+    eligible = k >= max(min_clients, 1)
+    precision = np.divide(curve['downs'], k, out=np.full(len(k), -np.inf), where=eligible)
+    # ROI is increasing in the down-sell rate of the target
+    i_roi = int(np.argmax(precision))
+
+    return {
+        'max_net_benefit': _cut(curve, i_net, action_cost, value_saved, effectiveness),
+        'max_roi': _cut(curve, i_roi, action_cost, value_saved, effectiveness)
+    }
+
+
+def sensitivity_surface(curve, action_cost, value_saved, effectiveness):
+    """
+    Net benefit and ROI of the net-benefit-optimal cut for every
+    combination of broadcast parameter arrays, e.g.
+    effectiveness[:, None, None], action_cost[None, :, None],
+    value_saved[None, None, :].
+
+    Returns the calculate_roi_grid structured array plus the optimal
+    number of targeted clients ('k') and score threshold ('threshold').
+    """
+    i = best_net_benefit_index(curve, action_cost, value_saved, effectiveness)
+    k = curve['k'][i]
+    rate = np.divide(curve['downs'][i], k, out=np.zeros(np.shape(k)), where=k > 0)
+    grid = calculate_roi_grid(k, rate, action_cost, value_saved, effectiveness)
+    return {
+        'roi': grid,
+        'k': np.broadcast_to(k, grid.shape),
+        'threshold': np.broadcast_to(curve['threshold'][i], grid.shape)
+    }
@@ -0,0 +1,61 @@
+"""
+Monthly ARPU panel: one wide reference month plus the ARPU of other months.
+
+Replaces the chain of DataFrame merges on ID.  Each other month is aligned
+to the reference month through a hashed ID index, only its `arpu` column is
+pulled, and the wide reference frame is copied at most once whatever the
+number of months.
+"""
+import numpy as np
+import pandas as pd
+
+
+def align_ids(base_ids, other_ids):
+    """
+    Position of every base ID in other_ids (-1 when absent).
+    Duplicated IDs in other_ids resolve to their first occurrence.
+    """
+    other_index = pd.Index(other_ids)
+    if other_index.is_unique:
+        return other_index.get_indexer(base_ids)
+
+    first = np.flatnonzero(~other_index.duplicated())
+    positions = other_index[first].get_indexer(base_ids)
+    return np.where(positions >= 0, first[positions], -1)
+
+
+def build_panel(base, months, base_label='m2', on='ID', column='arpu'):
+    """
+    Join monthly snapshots onto a reference month.
+
+    base   : wide frame of the reference month (e.g. df2)
+    months : dict label -> (frame, how), how being 'inner' (customer must
+             be present that month) or 'left' (NaN when absent), e.g.
+             {'m3': (df3, 'inner'), 'm1': (df1, 'left')}
+
+    Returns the reference frame restricted to the 'inner' customers, with
+    `column` renamed to f"{column}_{base_label}" and one f"{column}_{label}"
+    column per other month, in the order given.
+    """
+    base_ids = base[on].to_numpy()
+    keep = np.ones(len(base), dtype=bool)
+    pulled = {}
+
+    for label, (frame, how) in months.items():
+        if how not in ('inner', 'left'):
+            raise ValueError(f"Unsupported join type for {label}: {how}")
+        positions = align_ids(base_ids, frame[on].to_numpy())
+        found = positions >= 0
+        if how == 'inner':
+            keep &= found
+
+        values = np.full(len(base), np.nan)
+        values[found] = frame[column].to_numpy(dtype=np.float64)[positions[found]]
+        pulled[f"{column}_{label}"] = values
+
+    # Single copy of the wide frame
+    panel = base if keep.all() else base.loc[keep]
+    panel = panel.reset_index(drop=True).rename(columns={column: f"{column}_{base_label}"})
+    for name, values in pulled.items():
+        panel[name] = values[keep]
+    return panel
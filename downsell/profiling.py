@@ -0,0 +1,199 @@
+"""
+Per-stage timing instrumentation.
+
+Each stage records wall time, CPU time of the process, rows processed and
+peak resident memory (sampled in a background thread, so NumPy, pandas and
+Arrow buffers are included).  Records are kept in a StageLog and, when a log
+path is set (DOWNSELL_PROFILE_LOG by default), appended to a JSON-lines
+file, one object per stage.
+
+    from downsell.profiling import stage, profiled
+
+    with stage('features', rows=len(df)):
+        build_features(df)
+
+    @profiled('score', rows=lambda model, X: len(X))
+    def score(model, X): ...
+
+Nested stages are recorded with their parent path ('load/decile'); the
+stack of open stages is kept per thread, so concurrent Streamlit sessions
+sharing a log do not nest into each other.
+"""
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+PROFILE_LOG = os.environ.get('DOWNSELL_PROFILE_LOG')
+SAMPLE_INTERVAL = 0.01
+# Records kept in memory per log (a Streamlit server runs for weeks)
+MAX_RECORDS = 10_000
+
+
+# ============================================================
+# MEMORY
+# ============================================================
+
+def current_rss():
+    """Resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # no /proc: high-water mark only (kB on Linux, bytes on macOS)
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class PeakMemory:
+    """Highest RSS while active (and above the starting level), sampled in a thread"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.start = self.peak = 0
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.start = self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    @property
+    def mb(self):
+        return (self.peak - self.start) / 1e6
+
+
+# ============================================================
+# STAGES
+# ============================================================
+
+class StageLog:
+    """Records of the stages of one run (a CLI call or a Streamlit rerun)"""
+
+    def __init__(self, log_path=PROFILE_LOG, run_id=None, max_records=MAX_RECORDS):
+        self.log_path = log_path
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.records = deque(maxlen=max_records)
+        self._local = threading.local()
+
+    @property
+    def _open(self):
+        """Stages open in the calling thread, outermost first"""
+        if not hasattr(self._local, 'open'):
+            self._local.open = []
+        return self._local.open
+
+    def begin(self, name, rows=None, **fields):
+        """Start a stage; returns the token to pass to end()"""
+        memory = PeakMemory().__enter__()
+        token = {
+            'name': name,
+            'path': '/'.join([t['name'] for t in self._open] + [name]),
+            'rows': rows,
+            'fields': fields,
+            'memory': memory,
+            'started_at': datetime.now().isoformat(timespec='milliseconds'),
+            'wall': time.perf_counter(),
+            'cpu': time.process_time()
+        }
+        self._open.append(token)
+        return token
+
+    def end(self, token, rows=None, **fields):
+        """Close a stage and record it"""
+        wall_s = time.perf_counter() - token['wall']
+        cpu_s = time.process_time() - token['cpu']
+        token['memory'].__exit__(None, None, None)
+        self._local.open = [t for t in self._open if t is not token]
+
+        rows = token['rows'] if rows is None else rows
+        record = {
+            'run': self.run_id,
+            'stage': token['path'],
+            'started_at': token['started_at'],
+            'wall_s': wall_s,
+            'cpu_s': cpu_s,
+            'rows': None if rows is None else int(rows),
+            'rows_per_s': rows / wall_s if rows and wall_s > 0 else None,
+            'peak_rss_mb': token['memory'].peak / 1e6,
+            'rss_increase_mb': token['memory'].mb,
+            **token['fields'],
+            **fields
+        }
+        self.records.append(record)
+        if self.log_path:
+            write_record(record, self.log_path)
+        return record
+
+    def stage(self, name, rows=None, **fields):
+        """Context manager around a stage; yields the token (set token['rows'] late if needed)"""
+        return _Stage(self, name, rows, fields)
+
+    def frame(self):
+        """Records as a DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(list(self.records))
+
+
+class _Stage:
+    def __init__(self, log, name, rows, fields):
+        self.log, self.name, self.rows, self.fields = log, name, rows, fields
+
+    def __enter__(self):
+        self.token = self.log.begin(self.name, self.rows, **self.fields)
+        return self.token
+
+    def __exit__(self, exc_type, *exc):
+        self.log.end(self.token, **({'error': exc_type.__name__} if exc_type else {}))
+
+
+def write_record(record, path):
+    """Append one record to a JSON-lines log"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, default=str) + '\n')
+
+
+def read_log(path):
+    """All records of a JSON-lines log"""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Default log of the process, used by the pipeline modules
+DEFAULT_LOG = StageLog()
+
+
+def stage(name, rows=None, **fields):
+    """Stage of the default log"""
+    return DEFAULT_LOG.stage(name, rows, **fields)
+
+
+def profiled(name=None, rows=None):
+    """
+    Decorator recording every call as a stage of the default log.
+    rows may be a number or a function of the call arguments.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name or func.__name__, rows(*args, **kwargs) if callable(rows) else rows):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
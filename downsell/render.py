@@ -0,0 +1,98 @@
+"""
+Server-side reduction of customer-level data before plotting.
+
+Charts never receive one point per customer: distributions are sent as
+histograms, two-variable views as density grids, and long curves are
+downsampled with Largest-Triangle-Three-Buckets (LTTB).  The payload is
+fixed by the number of bins / points asked for, whatever the size of the
+population.  Inputs may be memory-mapped; they are read
+in chunks.
+"""
+import numpy as np
+
+CHUNK = 1 << 20
+HISTOGRAM_BINS = 100
+GRID_BINS = (200, 200)
+CURVE_POINTS = 1000
+
+
+def _chunks(n, size=CHUNK):
+    for start in range(0, n, size):
+        yield slice(start, min(start + size, n))
+
+
+def histogram(values, bins=HISTOGRAM_BINS, range=None, weights=None):
+    """
+    Fixed-bin histogram of a (possibly memory-mapped) array.
+    Returns {'edges', 'centers', 'counts'}.
+    """
+    values = np.asarray(values)
+    if range is None:
+        range = (float(np.nanmin(values)), float(np.nanmax(values)))
+    edges = np.linspace(range[0], range[1], bins + 1)
+
+    counts = np.zeros(bins, dtype=np.float64)
+    for part in _chunks(len(values)):
+        w = None if weights is None else np.asarray(weights[part], dtype=np.float64)
+        counts += np.histogram(values[part], bins=edges, weights=w)[0]
+    return {
+        'edges': edges,
+        'centers': (edges[:-1] + edges[1:]) / 2,
+        'counts': counts
+    }
+
+
+def density_grid(x, y, bins=GRID_BINS, range=None, log=False):
+    """
+    2D count grid of (x, y) pairs, for a heatmap instead of a scatter.
+    Returns {'x', 'y', 'z'} with z[i, j] = count in y bin i, x bin j
+    (log1p counts when log=True).
+    """
+    if range is None:
+        range = [(float(np.nanmin(x)), float(np.nanmax(x))),
+                 (float(np.nanmin(y)), float(np.nanmax(y)))]
+    x_edges = np.linspace(range[0][0], range[0][1], bins[0] + 1)
+    y_edges = np.linspace(range[1][0], range[1][1], bins[1] + 1)
+
+    z = np.zeros((bins[1], bins[0]), dtype=np.float64)
+    for part in _chunks(len(x)):
+        z += np.histogram2d(y[part], x[part], bins=(y_edges, x_edges))[0]
+    return {
+        'x': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y': (y_edges[:-1] + y_edges[1:]) / 2,
+        'z': np.log1p(z) if log else z
+    }
+
+
+def lttb(x, y, n_out=CURVE_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling of a curve sorted by x:
+    keeps the first and last points and, in each of n_out - 2 buckets, the
+    point forming the largest triangle with the previous kept point and the
+    mean of the next bucket.  Returns (x, y) with at most n_out points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        a = selected[i]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (next_y - y[a]))
+        selected[i + 1] = start + int(np.argmax(area))
+
+    return x[selected], y[selected]
@@ -0,0 +1,235 @@
+"""
+Incremental monthly retraining.
+
+Instead of rebuilding df_clean and refitting from zero, each month:
+
+  * the newest labelled M2 -> M3 pairs are encoded with the saved encoder
+    and appended to a rolling-window training store on disk (one Parquet
+    file per month, oldest months dropped beyond the window);
+  * trees are added to the saved booster (XGBoost continued training via
+    xgb_model=, warm_start for the GradientBoosting fallback), fitted on
+    the new month only;
+  * optionally, a full refit on the rolling window is trained as baseline
+    and the AUC of both models on a held-out slice of the new month is
+    appended to a drift report.
+
+    python -m downsell.retrain mois1.csv mois2.csv mois3.csv --label 2025-12 --compare-full
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from downsell.encoding import TargetEncoder
+from downsell.features import COL_KEEP
+from downsell.models import load_date_reference, load_model, make_model, save_model
+from downsell.profiling import stage
+from downsell.training import build_training_set
+from downsell.tuning import BEST_PARAMS_PATH, load_best_params
+
+STORE_DIR = 'training_store'
+WINDOW = 6
+NEW_TREES = 50
+REPORT_PATH = 'models/retrain_report.json'
+
+
+# ============================================================
+# ROLLING-WINDOW TRAINING STORE
+# ============================================================
+
+def list_months(store_dir=STORE_DIR):
+    """Month labels in the store, oldest first (labels sort chronologically)"""
+    paths = sorted(glob.glob(os.path.join(store_dir, '*.parquet')))
+    return [os.path.splitext(os.path.basename(p))[0] for p in paths]
+
+
+def check_label(label, store_dir=STORE_DIR):
+    """
+    The store only moves forward: label must sort after the stored months
+    (or equal the newest one, which is then replaced)
+    """
+    months = list_months(store_dir)
+    if months and label < months[-1]:
+        raise ValueError(f"Month {label} is older than the newest stored month {months[-1]}; "
+                         "the rolling window only accepts the newest month")
+
+
+def add_month(label, X, y, store_dir=STORE_DIR, window=WINDOW):
+    """Store one month of encoded features and labels, keeping the last `window` months"""
+    check_label(label, store_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    frame = pd.DataFrame(np.asarray(X, dtype=np.float32), columns=COL_KEEP)
+    frame['down_sell'] = np.asarray(y, dtype=np.int8)
+    frame.to_parquet(os.path.join(store_dir, f"{label}.parquet"), index=False)
+
+    months = list_months(store_dir)
+    for old in months[:max(len(months) - window, 0)]:
+        os.remove(os.path.join(store_dir, f"{old}.parquet"))
+    return list_months(store_dir)
+
+
+def load_window(store_dir=STORE_DIR, months=None):
+    """(X float32, y) of the stored months (all of them by default)"""
+    months = list_months(store_dir) if months is None else months
+    frames = [pd.read_parquet(os.path.join(store_dir, f"{m}.parquet")) for m in months]
+    if not frames:
+        return np.empty((0, len(COL_KEEP)), dtype=np.float32), np.empty(0, dtype=np.int8)
+    frame = pd.concat(frames, ignore_index=True)
+    return frame[COL_KEEP].to_numpy(dtype=np.float32), frame['down_sell'].to_numpy()
+
+
+# ============================================================
+# MODELS
+# ============================================================
+
+def _params():
+    """Production configuration: tuned parameters when available"""
+    return load_best_params() if os.path.exists(BEST_PARAMS_PATH) else {}
+
+
+def _frame(X):
+    """col_keep DataFrame: the notebook fits on named columns, and continued
+    training checks the new data against the booster's feature names"""
+    return pd.DataFrame(np.asarray(X, dtype=np.float32), columns=COL_KEEP)
+
+
+def _scale_pos_weight(y):
+    y = np.asarray(y)
+    return (y == 0).sum() / max((y == 1).sum(), 1)
+
+
+def update_model(model, X_new, y_new, n_trees=NEW_TREES):
+    """Add n_trees boosting rounds fitted on the new month only"""
+    if hasattr(model, 'get_booster'):
+        params = {**_params(), 'n_estimators': n_trees}
+        updated = make_model(_scale_pos_weight(y_new), **params)
+        updated.fit(_frame(X_new), y_new, xgb_model=model.get_booster())
+        return updated
+    model.set_params(warm_start=True, n_estimators=model.n_estimators_ + n_trees)
+    return model.fit(_frame(X_new), y_new)
+
+
+def full_refit(X, y):
+    """Baseline: the production model refitted from zero"""
+    model = make_model(_scale_pos_weight(y), **_params())
+    return model.fit(_frame(X), y)
+
+
+def append_report(record, path=REPORT_PATH):
+    """Add one retraining record to the JSON drift report"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    history = []
+    if os.path.exists(path):
+        with open(path) as f:
+            history = json.load(f)
+    history.append(record)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+    return history
+
+
+# ============================================================
+# MONTHLY RUN
+# ============================================================
+
+def retrain_month(months, label, model_path, encoder_path, out_path=None,
+                  store_dir=STORE_DIR, window=WINDOW, n_trees=NEW_TREES,
+                  compare_full=False, holdout=0.2, date_reference=None,
+                  report_path=REPORT_PATH, random_state=42):
+    """
+    Incremental update with the newest month (months = M1, M2, M3 paths).
+    The model is written to out_path (model_path by default); returns the
+    report record.
+    """
+    check_label(label, store_dir)
+    if date_reference is None:
+        # the booster and encoder were fitted on seniority from this date
+        date_reference = load_date_reference(model_path)
+
+    encoder = TargetEncoder.load(encoder_path)
+    X, y, _ = build_training_set(*months, date_reference=date_reference, encoder=encoder)
+    X = X.to_numpy(dtype=np.float32)
+    y = y.to_numpy()
+
+    train_idx, eval_idx = train_test_split(
+        np.arange(len(y)), test_size=holdout, random_state=random_state, stratify=y
+    )
+    previous_months = [m for m in list_months(store_dir) if m < label]
+    add_month(label, X, y, store_dir, window)
+
+    model = load_model(model_path)
+    auc_before = roc_auc_score(y[eval_idx], model.predict_proba(_frame(X[eval_idx]))[:, 1])
+
+    start = time.perf_counter()
+    with stage('train', rows=len(train_idx)):
+        model = update_model(model, X[train_idx], y[train_idx], n_trees)
+    incremental_s = time.perf_counter() - start
+    save_model(model, out_path or model_path, date_reference=date_reference)
+
+    record = {
+        'label': label,
+        'retrained_at': datetime.now().isoformat(timespec='seconds'),
+        'new_rows': int(len(train_idx)),
+        'eval_rows': int(len(eval_idx)),
+        'auc_before': auc_before,
+        'auc_incremental': roc_auc_score(y[eval_idx], model.predict_proba(_frame(X[eval_idx]))[:, 1]),
+        'incremental_s': incremental_s,
+        'window': list_months(store_dir)
+    }
+
+    if compare_full:
+        # same rows as the incremental model has seen: the window before
+        # this month plus the training part of the new month
+        X_old, y_old = load_window(store_dir, previous_months[-(window - 1):] if window > 1 else [])
+        X_full = np.concatenate([X_old, X[train_idx]])
+        y_full = np.concatenate([y_old, y[train_idx]])
+
+        start = time.perf_counter()
+        with stage('train_full', rows=len(y_full)):
+            baseline = full_refit(X_full, y_full)
+        record['full_s'] = time.perf_counter() - start
+        record['full_rows'] = int(len(y_full))
+        record['auc_full'] = roc_auc_score(y[eval_idx], baseline.predict_proba(_frame(X[eval_idx]))[:, 1])
+        record['auc_drift'] = record['auc_incremental'] - record['auc_full']
+
+    append_report(record, report_path)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental monthly retraining of the down-sell model")
+    parser.add_argument('months', nargs=3, metavar='MONTH', help="M1, M2, M3 extracts (M3 gives the labels)")
+    parser.add_argument('--label', required=True, help="month label, e.g. 2025-12 (must sort chronologically)")
+    parser.add_argument('--model', default='models/xgb_model.json')
+    parser.add_argument('--encoder', default='models/target_encoder.npz')
+    parser.add_argument('--out', default=None, help="updated model path (default: overwrite --model)")
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--trees', type=int, default=NEW_TREES)
+    parser.add_argument('--date-reference', default=None,
+                        help="date used for seniority_days (default: the training date saved with the model)")
+    parser.add_argument('--compare-full', action='store_true',
+                        help="also refit on the whole window and report the AUC drift")
+    args = parser.parse_args()
+
+    record = retrain_month(
+        args.months, args.label, args.model, args.encoder, args.out,
+        store_dir=args.store, window=args.window, n_trees=args.trees,
+        compare_full=args.compare_full, date_reference=args.date_reference
+    )
+    print(f"{record['label']}: +{args.trees} trees on {record['new_rows']:,} rows "
+          f"in {record['incremental_s']:.1f} s, AUC {record['auc_before']:.4f} -> {record['auc_incremental']:.4f}")
+    if 'auc_full' in record:
+        print(f"Full refit on {record['full_rows']:,} rows in {record['full_s']:.1f} s, "
+              f"AUC {record['auc_full']:.4f} (drift {record['auc_drift']:+.4f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Sorted-score prefix-sum index over a scored population.
+
+Scores are sorted once in descending order together with the cumulative
+number of down-sellers, so any threshold or top-K cut is answered with a
+binary search instead of a scan of every customer.
+"""
+import numpy as np
+import pandas as pd
+
+from downsell.store import down_weights, DEFAULT_THRESHOLDS
+
+
+def build_score_index(population):
+    """
+    Build the index once per scored population.
+
+    keys[i]      = -score of the (i+1)-th best customer (ascending)
+    cum_downs[k] = down-sellers among the top k customers (cum_downs[0] = 0)
+    """
+    y_proba = np.asarray(population['y_proba'])
+    weights = np.asarray(down_weights(population), dtype=np.float64)
+
+    order = np.argsort(-y_proba, kind='stable')
+    keys = -y_proba[order].astype(np.float64)
+    cum_downs = np.concatenate(([0.0], np.cumsum(weights[order])))
+
+    return {
+        'n': len(y_proba),
+        'keys': keys,
+        'cum_downs': cum_downs,
+        'order': order
+    }
+
+
+def count_above(index, threshold):
+    """Number of customers with score >= threshold (O(log n))"""
+    return np.searchsorted(index['keys'], -np.asarray(threshold, dtype=np.float64), side='right')
+
+
+def cut_top_k(index, k):
+    """Targeting figures when the k best-scored customers are contacted"""
+    k = int(np.clip(k, 0, index['n']))
+    downs = float(index['cum_downs'][k])
+    return {
+        'targeted_clients': k,
+        'targeted_downs': downs,
+        'pct_clients': k / index['n'] * 100 if index['n'] else 0.0,
+        'down_rate': downs / k if k else 0.0,
+        'threshold': -float(index['keys'][k - 1]) if k else 1.0
+    }
+
+
+def cut_at_threshold(index, threshold):
+    """Targeting figures for every customer scored at or above threshold"""
+    cut = cut_top_k(index, count_above(index, threshold))
+    cut['threshold'] = threshold
+    return cut
+
+
+# ============================================================
+# REFERENCE TABLES
+# ============================================================
+
+def decile_bounds(n):
+    """Rank bounds of the 10 deciles (decile d = ranks bounds[d-1] to bounds[d])"""
+    size = max(n // 10, 1)
+    bounds = np.minimum(np.arange(11) * size, n)
+    bounds[-1] = n
+    return bounds
+
+
+def decile_positions(index, deciles):
+    """Customers (positions in the population) of the given deciles, best first"""
+    bounds = decile_bounds(index['n'])
+    return np.concatenate([index['order'][bounds[d - 1]:bounds[d]] for d in sorted(deciles)]
+                          or [np.empty(0, dtype=np.int64)])
+
+
+def decile_table(index):
+    """
+    Decile table (decile 1 = highest scores):
+    decile, clients, downs, rate, lift
+    """
+    n = index['n']
+    bounds = decile_bounds(n)
+
+    clients = np.diff(bounds)
+    downs = np.diff(index['cum_downs'][bounds])
+    rate = np.divide(downs, clients, out=np.zeros(10), where=clients > 0)
+    overall = index['cum_downs'][-1] / n if n else 0.0
+
+    return pd.DataFrame({
+        'decile': np.arange(1, 11),
+        'clients': clients,
+        'downs': np.rint(downs).astype(np.int64),
+        'rate': rate,
+        'lift': rate / overall if overall else np.zeros(10)
+    })
+
+
+def threshold_table(index, thresholds=DEFAULT_THRESHOLDS):
+    """
+    Targeting volume for each probability threshold:
+    threshold, targeted_clients, pct_clients, targeted_downs
+    """
+    n = index['n']
+    targeted = count_above(index, thresholds)
+    return pd.DataFrame({
+        'threshold': thresholds,
+        'targeted_clients': targeted,
+        'pct_clients': np.round(targeted / n * 100, 1) if n else 0.0,
+        'targeted_downs': np.rint(index['cum_downs'][targeted]).astype(np.int64)
+    })
@@ -0,0 +1,122 @@
+"""
+Columnar store for the scored population (one row per customer).
+
+A store is either a directory of NumPy files opened memory-mapped
+(y_proba.npy, optional y_true.npy, ID.npy and arpu.npy, optional meta.json) or a
+single Parquet file with the same columns.  Decile and threshold tables are
+computed from the score vectors on demand (see score_index).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Thresholds shown in the simulator reference table
+DEFAULT_THRESHOLDS = [0.3, 0.4, 0.423, 0.5, 0.6, 0.7]
+
+
+# ============================================================
+# READ / WRITE
+# ============================================================
+
+def save_scored_population(path, y_proba, y_true=None, ids=None, meta=None, arpu=None):
+    """
+    Write a scored population as a directory of .npy files
+    (or a Parquet file when path ends with .parquet)
+    """
+    y_proba = np.asarray(y_proba, dtype=np.float32)
+    columns = {'y_proba': y_proba}
+    if y_true is not None:
+        columns['y_true'] = np.asarray(y_true, dtype=np.int8)
+    if ids is not None:
+        columns['ID'] = np.asarray(ids, dtype=np.int64)
+    if arpu is not None:
+        columns['arpu'] = np.asarray(arpu, dtype=np.float32)
+
+    if str(path).endswith('.parquet'):
+        pd.DataFrame(columns).to_parquet(path, index=False)
+        return path
+
+    os.makedirs(path, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f"{name}.npy"), values)
+    if meta:
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+    return path
+
+
+def load_scored_population(path):
+    """
+    Open a scored population without copying the score vectors.
+
+    Returns a dict with 'y_proba', 'y_true' (None when labels are unknown),
+    'ID', 'arpu' (or None) and 'meta'.
+    """
+    if str(path).endswith('.parquet'):
+        df = pd.read_parquet(path)
+        # monthly scoring output (downsell.score) names the column 'score'
+        score_column = 'y_proba' if 'y_proba' in df else 'score'
+        return {
+            'y_proba': df[score_column].to_numpy(dtype=np.float32),
+            'y_true': df['y_true'].to_numpy(dtype=np.int8) if 'y_true' in df else None,
+            'ID': df['ID'].to_numpy() if 'ID' in df else None,
+            'arpu': df['arpu'].to_numpy(dtype=np.float32) if 'arpu' in df else None,
+            'meta': {}
+        }
+
+    def _open(name):
+        file = os.path.join(path, f"{name}.npy")
+        return np.load(file, mmap_mode='r') if os.path.exists(file) else None
+
+    meta_file = os.path.join(path, 'meta.json')
+    meta = {}
+    if os.path.exists(meta_file):
+        with open(meta_file) as f:
+            meta = json.load(f)
+
+    y_proba = _open('y_proba')
+    if y_proba is None:
+        raise FileNotFoundError(f"No y_proba.npy in {path}")
+
+    return {
+        'y_proba': y_proba,
+        'y_true': _open('y_true'),
+        'ID': _open('ID'),
+        'arpu': _open('arpu'),
+        'meta': meta
+    }
+
+
+def store_version(path):
+    """Modification time of the store, used to invalidate caches"""
+    if os.path.isdir(path):
+        return max(os.path.getmtime(os.path.join(path, f)) for f in os.listdir(path))
+    return os.path.getmtime(path)
+
+
+# ============================================================
+# DERIVED TABLES
+# ============================================================
+
+def down_weights(population):
+    """
+    Per-customer down-sell indicator: the observed label when known,
+    otherwise the predicted probability (expected down-sellers)
+    """
+    if population['y_true'] is not None:
+        return population['y_true']
+    return population['y_proba']
+
+
+def global_stats(population):
+    """Population size and down-sell rate"""
+    n = len(population['y_proba'])
+    downs = float(np.sum(down_weights(population), dtype=np.float64))
+    return {
+        'total_test': n,
+        'total_clients': population['meta'].get('total_population', n),
+        'global_down_rate': downs / n if n else 0.0
+    }
+
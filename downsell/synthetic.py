@@ -0,0 +1,227 @@
+"""
+Synthetic monthly extracts with the mois1/2/3.csv schema.
+
+The real extracts cannot leave the company; these files reproduce their
+shape for load and memory tests: same columns, ';' separator, day-first
+activation dates, blanks where the extracts have them, heavy-tailed ARPU
+correlated from one month to the next, and a down-sell target
+(arpu_m3 <= 0.75 x arpu_m2) at a configurable rate that depends on the
+features (M1 -> M2 decline, activity, seniority, services), so models have
+something to learn.
+
+Customers are generated in independent blocks (one seed per block) by a
+process pool; each block is written to part files that are appended to the
+final CSVs in order as they complete.  At most two blocks per worker are
+in flight, so memory and temporary disk space are bounded by a few blocks
+whatever the number of rows.
+
+    python -m downsell.synthetic --rows 20000000 --down-rate 0.4 --out data/
+"""
+import argparse
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from downsell.features import DATE_REFERENCE
+from downsell.loader import MONTH_SCHEMA, SEP
+
+BLOCK_SIZE = 500_000
+DOWN_RATE = 0.4
+MONTHS = ['mois1.csv', 'mois2.csv', 'mois3.csv']
+
+# Handsets and regions with rough market shares
+HANDSETS = {
+    'TECNO': 0.22, 'ITEL': 0.18, 'SAMSUNG': 0.14, 'INFINIX': 0.09, 'HUAWEI': 0.05,
+    'NOKIA': 0.05, 'APPLE': 0.04, 'XIAOMI': 0.04, 'OPPO': 0.03, 'ALCATEL': 0.03,
+    'VIVO': 0.02, 'REALME': 0.02, 'MOTOROLA': 0.02, 'LG': 0.01, 'SONY': 0.01,
+    'GOOGLE': 0.01, 'LENOVO': 0.01, 'WIKO': 0.01, 'ZTE': 0.01, 'UNKNOWN': 0.01
+}
+REGIONS = {
+    'CENTRE': 0.24, 'LITTORAL': 0.22, 'OUEST': 0.11, 'NORD': 0.08, 'EXTREME-NORD': 0.08,
+    'NORD-OUEST': 0.07, 'SUD-OUEST': 0.06, 'ADAMAOUA': 0.05, 'EST': 0.05, 'SUD': 0.04
+}
+
+# Share of customers absent from M1 (new in M2) and from M3 (left)
+NEW_IN_M2 = 0.05
+LEFT_IN_M3 = 0.02
+MISSING_DATE = 0.03
+MISSING_REGION = 0.02
+MISSING_USAGE = 0.01
+MAX_SENIORITY = 6000
+
+
+def _choice(rng, shares, n):
+    names = np.array(list(shares))
+    p = np.array(list(shares.values()))
+    return names[rng.choice(len(names), n, p=p / p.sum())]
+
+
+def _month_usage(rng, arpu, activity, data_user, om_user):
+    """Usage columns of one month for customers with the given ARPU and traits"""
+    n = len(arpu)
+    active_days = rng.binomial(30, activity)
+    data_share = np.where(data_user, rng.beta(1.5, 3, n), 0.0)
+
+    usage = {
+        'arpu': arpu,
+        'arpu_voix': arpu * (1 - data_share) * rng.beta(6, 2, n),
+        'arpu_data': arpu * data_share,
+        'NB_J_REVENU': rng.binomial(active_days, 0.8),
+        'NB_J_VOIX': rng.binomial(active_days, 0.9),
+        'nb_j_data': np.where(data_user, rng.binomial(active_days, 0.7), 0),
+        'nb_jr_activite': active_days,
+        'OM_nb_jr_activite': np.where(om_user, rng.binomial(active_days, 0.3), 0),
+    }
+    usage['MOU'] = rng.gamma(1.2, 2.5, n) * usage['NB_J_VOIX']
+    usage['volume_data_in'] = np.where(data_user, rng.lognormal(3.5, 1.3, n) * usage['nb_j_data'], 0.0)
+    usage['OM_Montant'] = np.where(om_user, rng.lognormal(9.5, 1.2, n), 0.0)
+
+    # occasional blanks, as in the extracts
+    for column in ['MOU', 'volume_data_in', 'OM_Montant']:
+        usage[column] = np.where(rng.random(n) < MISSING_USAGE, np.nan, usage[column])
+    return usage
+
+
+def generate_block(start, n, seed, down_rate=DOWN_RATE, date_reference=DATE_REFERENCE):
+    """Three monthly Arrow tables (M1, M2, M3) for customers start .. start + n - 1"""
+    rng = np.random.default_rng([seed, start])
+
+    # Customer traits, stable across months
+    base_arpu = rng.lognormal(7.6, 1.1, n) * (rng.random(n) > 0.03)
+    activity = rng.beta(4, 1.5, n)
+    data_user = rng.random(n) < 0.6
+    om_user = rng.random(n) < 0.4
+    seniority = np.minimum(rng.exponential(900, n), MAX_SENIORITY).astype(np.int64)
+    # one formatted date per possible seniority instead of one per customer
+    dates = pd.Timestamp(date_reference) - pd.to_timedelta(np.arange(MAX_SENIORITY + 1), 'D')
+    activation = np.asarray(dates.strftime('%d/%m/%Y'), dtype=object)[seniority]
+    activation[rng.random(n) < MISSING_DATE] = None
+    handset = _choice(rng, HANDSETS, n)
+    region = np.where(rng.random(n) < MISSING_REGION, None, _choice(rng, REGIONS, n).astype(object))
+
+    # M1 -> M2: correlated ARPU around the customer's base level
+    arpu_m1 = base_arpu * rng.lognormal(0, 0.25, n)
+    arpu_m2 = base_arpu * rng.lognormal(0, 0.25, n)
+
+    # Down-sell risk from M2 features.  Customers with zero ARPU in M2 always
+    # count as down-sellers (0 <= 0.75 x 0), so they are taken out of the
+    # draw and the riskiest others fill the rest of the down_rate share.
+    decline = np.log((arpu_m2 + 100) / (arpu_m1 + 100))
+    risk = (-1.5 * decline
+            - 2.0 * activity
+            + 0.8 * (seniority < 270)
+            - 0.4 * om_user
+            - 0.3 * data_user
+            + rng.logistic(0, 0.6, n))
+    zero = arpu_m2 == 0
+    down = zero.copy()
+    share = (down_rate * n - zero.sum()) / max(n - zero.sum(), 1)
+    if share > 0:
+        down[~zero] = risk[~zero] >= np.quantile(risk[~zero], 1 - min(share, 1.0))
+
+    arpu_m3 = np.where(
+        down,
+        arpu_m2 * rng.uniform(0.05, 0.75, n),
+        arpu_m2 * np.maximum(rng.lognormal(0.05, 0.25, n), 0.76)
+    )
+
+    ids = np.arange(start, start + n, dtype=np.int64)
+    static = {'DATE_ACTIVATION': activation, 'handset': handset, 'region_administrative': region}
+    tables = []
+    for arpu, month_activity, present in [
+        (arpu_m1, activity, rng.random(n) >= NEW_IN_M2),
+        (arpu_m2, activity, np.ones(n, dtype=bool)),
+        (arpu_m3, np.where(down, activity * 0.7, activity), rng.random(n) >= LEFT_IN_M3),
+    ]:
+        columns = {'ID': ids, **_month_usage(rng, arpu, month_activity, data_user, om_user), **static}
+        tables.append(pa.table({
+            name: pa.array(np.round(columns[name][present], 2) if columns[name].dtype.kind == 'f'
+                           else columns[name][present], from_pandas=True)
+            for name in MONTH_SCHEMA
+        }))
+    return tables
+
+
+def _write_block(task):
+    """Generate one block and write its part of every month (worker process)"""
+    tables = generate_block(task['start'], task['n'], task['seed'], task['down_rate'], task['date_reference'])
+    options = pacsv.WriteOptions(include_header=False, delimiter=SEP, quoting_style='none')
+    paths = []
+    for table, month in zip(tables, MONTHS):
+        path = os.path.join(task['workdir'], f"{month}.part{task['block']:06d}")
+        pacsv.write_csv(table, path, options)
+        paths.append(path)
+    return paths
+
+
+def _append_parts(outputs, part_paths):
+    """Append one block's part files to the month files and delete them"""
+    for out, part_path in zip(outputs, part_paths):
+        with open(part_path) as part:
+            shutil.copyfileobj(part, out, 1 << 22)
+        os.remove(part_path)
+
+
+def generate_months(rows, out_dir, down_rate=DOWN_RATE, seed=42, block_size=BLOCK_SIZE,
+                    n_workers=os.cpu_count(), date_reference=DATE_REFERENCE):
+    """Write mois1/2/3.csv with `rows` customers in M2; returns the three paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    workdir = os.path.join(out_dir, '.parts')
+    os.makedirs(workdir, exist_ok=True)
+    tasks = [
+        {'block': b, 'start': start, 'n': min(block_size, rows - start), 'seed': seed,
+         'down_rate': down_rate, 'date_reference': date_reference, 'workdir': workdir}
+        for b, start in enumerate(range(0, rows, block_size))
+    ]
+
+    paths = [os.path.join(out_dir, month) for month in MONTHS]
+    outputs = [open(path, 'w', newline='') for path in paths]
+    try:
+        for out in outputs:
+            out.write(SEP.join(MONTH_SCHEMA) + '\n')
+        # blocks are appended in order and deleted as soon as they are copied;
+        # a new block is submitted only when one has been consumed
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_write_block, task))
+                if len(pending) >= 2 * n_workers:
+                    _append_parts(outputs, pending.popleft().result())
+            while pending:
+                _append_parts(outputs, pending.popleft().result())
+    finally:
+        for out in outputs:
+            out.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic mois1/2/3.csv extracts")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="customers in M2")
+    parser.add_argument('--down-rate', type=float, default=DOWN_RATE, help="share of M2 customers who down-sell in M3")
+    parser.add_argument('--out', default='.', help="output directory")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--block-size', type=int, default=BLOCK_SIZE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--date-reference', default=DATE_REFERENCE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = generate_months(
+        args.rows, args.out, down_rate=args.down_rate, seed=args.seed,
+        block_size=args.block_size, n_workers=args.workers, date_reference=args.date_reference
+    )
+    sizes = ", ".join(f"{os.path.basename(p)} {os.path.getsize(p) / 1e6:,.0f} MB" for p in paths)
+    print(f"{args.rows:,} customers in {time.perf_counter() - start:.1f} s: {sizes}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""
+Multi-model training and comparison on one shared feature matrix.
+
+The col_keep matrix is written once as float32 .npy files; every worker of
+the process pool memory-maps it read-only instead of receiving a pickled
+copy.  All candidates are evaluated on the same stratified split (or the
+same k folds), and the comparison table is written to CSV at the end.
+
+When the raw categorical columns are passed as `categories`, their *_enc
+columns are re-encoded inside every fold from the training rows only, so the
+test rows of a fold never contribute to their own encoding:
+
+    from downsell.training import compare_models
+    comparison = compare_models(df_clean[col_keep], df_clean['down_sell'], n_folds=5,
+                                categories=df_clean[['handset', 'region_administrative',
+                                                     'class_arpu', 'seniority_class']])
+"""
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from downsell.cache import read_month_cached
+from downsell.encoding import TargetEncoder
+from downsell.features import CATEGORICAL_VARS, COL_KEEP, DATE_REFERENCE, build_features
+from downsell.models import LR_PARAMS, RF_PARAMS, make_model
+from downsell.panel import build_panel
+from downsell.profiling import stage
+
+# name -> (kind, params): the three models of notebook cells 50-54
+DEFAULT_CANDIDATES = {
+    'Logistic Regression': ('logreg', {}),
+    'Random Forest': ('random_forest', {}),
+    'XGBoost': ('xgboost', {}),
+}
+
+METRICS = ['auc', 'f1', 'precision', 'recall', 'accuracy']
+
+
+def make_estimator(kind, params=None, scale_pos_weight=1.0, n_jobs=1):
+    """Estimator of a candidate kind, with the notebook parameters as defaults"""
+    params = dict(params or {})
+    if kind == 'logreg':
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), LogisticRegression(**{**LR_PARAMS, **params}))
+    if kind == 'random_forest':
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**{**RF_PARAMS, 'n_jobs': n_jobs, **params})
+    if kind == 'xgboost':
+        return make_model(scale_pos_weight, **{'n_jobs': n_jobs, **params})
+    raise ValueError(f"Unknown model kind: {kind}")
+
+
+# ============================================================
+# TRAINING DATA
+# ============================================================
+
+def build_training_set(m1_path, m2_path, m3_path, date_reference=DATE_REFERENCE,
+                       encoder=None):
+    """
+    col_keep features and down_sell target from three monthly extracts,
+    following notebook cells 1-42: M2 panel with M3 (inner) and M1 (left)
+    ARPU, customers with unknown activation date and extreme M2->M3
+    variations removed, out-of-fold target encoding (or the tables of a
+    fitted `encoder`, to stay consistent with a saved model).
+    Returns (X, y, encoder).  The out-of-fold encoding spans all rows: pass
+    the raw columns to compare_models(categories=...) for a clean hold-out.
+    """
+    with stage('load') as token:
+        df1 = read_month_cached(m1_path, columns=['ID', 'arpu'])
+        df2 = read_month_cached(m2_path)
+        df3 = read_month_cached(m3_path, columns=['ID', 'arpu'])
+        token['rows'] = len(df1) + len(df2) + len(df3)
+    with stage('merge') as token:
+        df = build_panel(df2, {'m3': (df3, 'inner'), 'm1': (df1, 'left')}, base_label='m2')
+        token['rows'] = len(df)
+    del df1, df2, df3
+
+    with stage('features', rows=len(df)):
+        build_features(df, date_reference)
+        keep = (df['seniority_days'] != -1) & df['variation'].between(-1, 5)
+        df = df.loc[keep].reset_index(drop=True)
+
+    with stage('encode', rows=len(df)):
+        if encoder is None:
+            encoder = TargetEncoder(CATEGORICAL_VARS)
+            encoder.fit_transform(df, df['down_sell'])
+        else:
+            encoder.transform(df)
+    return df[COL_KEEP], df['down_sell'], encoder
+
+
+# ============================================================
+# SHARED MATRIX AND SPLITS
+# ============================================================
+
+def write_matrix(X, y, workdir):
+    """Write X (float32) and y (int8) as .npy files for memory mapping"""
+    os.makedirs(workdir, exist_ok=True)
+    X_path = os.path.join(workdir, 'X.npy')
+    y_path = os.path.join(workdir, 'y.npy')
+    np.save(X_path, np.ascontiguousarray(np.asarray(X, dtype=np.float32)))
+    np.save(y_path, np.asarray(y, dtype=np.int8))
+    return X_path, y_path
+
+
+def write_categories(categories, workdir):
+    """Write the category codes (int32, -1 for missing) of each column as one .npy file"""
+    os.makedirs(workdir, exist_ok=True)
+    C_path = os.path.join(workdir, 'C.npy')
+    codes = [pd.factorize(categories[col], sort=True)[0] for col in categories.columns]
+    np.save(C_path, np.column_stack(codes).astype(np.int32))
+    return C_path
+
+
+def encode_fold(C, columns, train_idx, test_idx, y_train):
+    """
+    Target encoding of one fold fitted on its training rows: training rows
+    are encoded out-of-fold, test rows with the tables of all training rows
+    """
+    labels = [np.arange(n).astype(str) for n in np.asarray(C).max(axis=0) + 1]
+
+    def frame(idx):
+        return pd.DataFrame({
+            col: pd.Categorical.from_codes(C[idx, j], categories=labels[j])
+            for j, col in enumerate(columns)
+        })
+
+    train, test = frame(train_idx), frame(test_idx)
+    encoder = TargetEncoder(columns)
+    encoder.fit_transform(train, y_train)
+    encoder.transform(test)
+    return ({col: train[col + encoder.suffix].to_numpy() for col in columns},
+            {col: test[col + encoder.suffix].to_numpy() for col in columns})
+
+
+def make_splits(y, n_folds=None, test_size=0.2, random_state=42):
+    """
+    List of (train_idx, test_idx): one stratified train/test split, or
+    stratified k folds when n_folds is given
+    """
+    y = np.asarray(y)
+    rows = np.arange(len(y))
+    if n_folds:
+        folds = StratifiedKFold(n_folds, shuffle=True, random_state=random_state)
+        return list(folds.split(rows, y))
+    train_idx, test_idx = train_test_split(
+        rows, test_size=test_size, random_state=random_state, stratify=y
+    )
+    return [(np.sort(train_idx), np.sort(test_idx))]
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+def _fit_and_score(task):
+    """Train one candidate on one fold (runs in a worker process)"""
+    from sklearn.metrics import (accuracy_score, f1_score, precision_score,
+                                 recall_score, roc_auc_score)
+
+    X = np.load(task['X_path'], mmap_mode='r')
+    y = np.load(task['y_path'], mmap_mode='r')
+    train_idx, test_idx = task['train_idx'], task['test_idx']
+    y_train, y_test = y[train_idx], y[test_idx]
+
+    scale_pos_weight = (y_train == 0).sum() / max((y_train == 1).sum(), 1)
+    model = make_estimator(task['kind'], task['params'], scale_pos_weight, task['n_jobs'])
+
+    X_train, X_test = X[train_idx], X[test_idx]
+    if task['C_path']:
+        C = np.load(task['C_path'], mmap_mode='r')
+        train_enc, test_enc = encode_fold(C, list(task['encoded']), train_idx, test_idx, y_train)
+        for col, j in task['encoded'].items():
+            X_train[:, j], X_test[:, j] = train_enc[col], test_enc[col]
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    y_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_proba >= 0.5).astype(np.int8)
+    return {
+        'model': task['name'],
+        'fold': task['fold'],
+        'auc': roc_auc_score(y_test, y_proba),
+        'f1': f1_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred, zero_division=0),
+        'recall': recall_score(y_test, y_pred),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'fit_s': fit_s,
+        'n_train': len(train_idx),
+        'n_test': len(test_idx)
+    }
+
+
+# ============================================================
+# HARNESS
+# ============================================================
+
+def compare_models(X, y, candidates=DEFAULT_CANDIDATES, n_folds=None,
+                   test_size=0.2, random_state=42, n_workers=None,
+                   workdir=None, out='model_comparison.csv', categories=None):
+    """
+    Train every candidate on every fold in a process pool and return the
+    comparison table (mean metrics per model, AUC spread across folds).
+    Per-fold results are written next to `out` as <out>_folds.csv.
+    `categories` (raw columns aligned with X, each with a <col>_enc column
+    in X) are target-encoded again inside each fold from its training rows.
+    """
+    n_workers = n_workers or os.cpu_count()
+    splits = make_splits(y, n_folds, test_size, random_state)
+    tasks_count = len(candidates) * len(splits)
+    n_jobs = max(1, os.cpu_count() // min(n_workers, tasks_count))
+
+    owns_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='downsell_train_')
+    try:
+        X_path, y_path = write_matrix(X, y, workdir)
+        C_path, encoded = None, {}
+        if categories is not None:
+            C_path = write_categories(categories, workdir)
+            encoded = {col: list(X.columns).index(col + '_enc') for col in categories.columns}
+        tasks = [
+            {'name': name, 'kind': kind, 'params': params, 'fold': fold,
+             'train_idx': train_idx, 'test_idx': test_idx,
+             'X_path': X_path, 'y_path': y_path, 'C_path': C_path,
+             'encoded': encoded, 'n_jobs': n_jobs}
+            for name, (kind, params) in candidates.items()
+            for fold, (train_idx, test_idx) in enumerate(splits)
+        ]
+        with stage('train', rows=len(y), tasks=tasks_count), \
+                ProcessPoolExecutor(max_workers=min(n_workers, tasks_count)) as pool:
+            folds = pd.DataFrame(pool.map(_fit_and_score, tasks))
+    finally:
+        if owns_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    comparison = folds.groupby('model', sort=False).agg(
+        **{m: (m, 'mean') for m in METRICS},
+        auc_std=('auc', 'std'),
+        fit_s=('fit_s', 'mean'),
+        n_folds=('fold', 'count')
+    ).reset_index().sort_values('auc', ascending=False, ignore_index=True)
+
+    if out:
+        comparison.to_csv(out, index=False)
+        folds.to_csv(os.path.splitext(out)[0] + '_folds.csv', index=False)
+    return comparison
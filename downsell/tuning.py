@@ -0,0 +1,208 @@
+"""
+Hyperparameter search for the down-sell classifier.
+
+Successive halving: n_configs random configurations are trained on a small
+subsample of the training rows, the best 1/eta move on to eta times more
+rows, until the survivors are trained on all of them.  Every fit uses
+early stopping on a fixed validation fold (so n_estimators is found, not
+searched) and XGBoost's histogram tree method on all cores.  An optional
+time budget stops the search after the first fit that ends past it; the
+best configuration among the fits of that last (possibly partial) rung wins.
+
+    python -m downsell.tuning mois1.csv mois2.csv mois3.csv --budget 3600
+
+The best configuration is written to models/xgb_best_params.json with its
+validation AUC and F1;
+make_model(scale_pos_weight, **load_best_params()) rebuilds the tuned model.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from downsell.metrics import best_threshold, threshold_sweep
+from downsell.models import GB_PARAMS, XGBOOST_AVAILABLE, make_model
+
+BEST_PARAMS_PATH = 'models/xgb_best_params.json'
+
+SEARCH_SPACE = {
+    'max_depth': [3, 4, 5, 6, 7, 8],
+    'learning_rate': [0.03, 0.05, 0.08, 0.1, 0.15],
+    'min_child_weight': [1, 5, 15, 30, 60],
+    'subsample': [0.6, 0.7, 0.8, 0.9, 1.0],
+    'colsample_bytree': [0.5, 0.6, 0.8, 1.0],
+    'gamma': [0.0, 0.1, 0.3, 1.0],
+    'reg_alpha': [0.0, 0.1, 1.0],
+    'reg_lambda': [1.0, 2.0, 5.0, 10.0],
+}
+
+N_CONFIGS = 27
+ETA = 3
+MAX_ESTIMATORS = 2000
+EARLY_STOPPING_ROUNDS = 50
+
+
+def sample_configs(n_configs=N_CONFIGS, space=SEARCH_SPACE, random_state=42):
+    """n_configs random draws from the grid; the notebook configuration comes first"""
+    rng = np.random.default_rng(random_state)
+    configs = [{
+        'max_depth': 6, 'learning_rate': 0.05, 'min_child_weight': 15,
+        'subsample': 0.8, 'colsample_bytree': 0.8, 'gamma': 0.1,
+        'reg_alpha': 0.1, 'reg_lambda': 2.0
+    }]
+    while len(configs) < n_configs:
+        config = {k: values[rng.integers(len(values))] for k, values in space.items()}
+        config = {k: v.item() if isinstance(v, np.generic) else v for k, v in config.items()}
+        if config not in configs:
+            configs.append(config)
+    return configs[:n_configs]
+
+
+def fit_with_early_stopping(config, X_train, y_train, X_valid, y_valid,
+                            max_estimators=MAX_ESTIMATORS,
+                            early_stopping_rounds=EARLY_STOPPING_ROUNDS):
+    """
+    Fit one configuration, stopping when the validation AUC has not improved
+    for early_stopping_rounds trees.  Returns (model, params) where params
+    holds the number of trees actually kept.
+    """
+    y_train = np.asarray(y_train)
+    scale_pos_weight = (y_train == 0).sum() / max((y_train == 1).sum(), 1)
+
+    if XGBOOST_AVAILABLE:
+        params = {**config, 'tree_method': 'hist'}
+        model = make_model(scale_pos_weight, n_estimators=max_estimators, n_jobs=-1,
+                           early_stopping_rounds=early_stopping_rounds, **params)
+        model.fit(X_train, y_train, eval_set=[(X_valid, y_valid)], verbose=False)
+        params['n_estimators'] = int(model.best_iteration) + 1
+    else:
+        # GradientBoosting stops on its own internal validation split
+        params = {k: v for k, v in config.items() if k in GB_PARAMS}
+        model = make_model(n_estimators=max_estimators, n_iter_no_change=early_stopping_rounds,
+                           validation_fraction=0.1, **params)
+        model.fit(X_train, y_train)
+        params['n_estimators'] = int(model.n_estimators_)
+    return model, params
+
+
+def successive_halving(X, y, configs=None, eta=ETA, valid_size=0.2,
+                       max_estimators=MAX_ESTIMATORS,
+                       early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                       time_budget=None, random_state=42):
+    """
+    Run the search and return a dict with the best 'params', its validation
+    'auc', 'f1' (at 0.5), 'f1_best' / 'threshold' (F1-optimal cut), and the
+    'history' of every fit (rung, config, rows, trees, auc, seconds).
+    """
+    configs = configs or sample_configs(random_state=random_state)
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    train_idx, valid_idx = train_test_split(
+        np.arange(len(y)), test_size=valid_size, random_state=random_state, stratify=y
+    )
+    X_valid, y_valid = X[valid_idx], y[valid_idx]
+
+    # nested subsamples: rung r uses the first rows of one fixed shuffle
+    n_rungs = int(math.log(len(configs), eta)) + 1 if len(configs) > 1 else 1
+    fraction = float(eta) ** -(n_rungs - 1)
+
+    start = time.perf_counter()
+    history = []
+    survivors = list(range(len(configs)))
+    for rung in range(n_rungs):
+        n_rows = max(int(len(train_idx) * fraction), 1000)
+        rows = np.sort(train_idx[:n_rows])
+        X_train, y_train = X[rows], y[rows]
+
+        results = []
+        for config_id in survivors:
+            fit_start = time.perf_counter()
+            model, params = fit_with_early_stopping(
+                configs[config_id], X_train, y_train, X_valid, y_valid,
+                max_estimators, early_stopping_rounds
+            )
+            y_proba = model.predict_proba(X_valid)[:, 1]
+            results.append({
+                'rung': rung, 'config_id': config_id, 'n_rows': len(rows),
+                'n_estimators': params['n_estimators'],
+                'auc': roc_auc_score(y_valid, y_proba),
+                'seconds': time.perf_counter() - fit_start,
+                'params': params, 'y_proba': y_proba
+            })
+            if time_budget and time.perf_counter() - start > time_budget:
+                break
+        history.extend(results)
+
+        ranked = sorted(results, key=lambda r: r['auc'], reverse=True)
+        out_of_time = time_budget and time.perf_counter() - start > time_budget
+        if rung == n_rungs - 1 or out_of_time:
+            break
+        survivors = [r['config_id'] for r in ranked[:max(len(ranked) // eta, 1)]]
+        fraction = min(fraction * eta, 1.0)
+
+    best = ranked[0]
+    sweep = threshold_sweep(y_valid, best['y_proba'], np.round(np.arange(0.05, 0.96, 0.01), 2))
+    best_cut = best_threshold(sweep)
+    return {
+        'params': best['params'],
+        'auc': best['auc'],
+        'f1': f1_score(y_valid, best['y_proba'] >= 0.5),
+        'f1_best': float(best_cut['f1']),
+        'threshold': float(best_cut['threshold']),
+        'n_rows': best['n_rows'],
+        'seconds': time.perf_counter() - start,
+        'history': pd.DataFrame([{k: v for k, v in r.items() if k not in ('params', 'y_proba')}
+                                 for r in history])
+    }
+
+
+# ============================================================
+# PERSISTENCE
+# ============================================================
+
+def save_best(result, path=BEST_PARAMS_PATH):
+    """Write the best configuration and its validation scores to JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    record = {k: result[k] for k in ('params', 'auc', 'f1', 'f1_best', 'threshold', 'n_rows', 'seconds')}
+    record['n_fits'] = len(result['history'])
+    record['tuned_at'] = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
+    return path
+
+
+def load_best_params(path=BEST_PARAMS_PATH):
+    """Tuned parameters, ready for make_model(scale_pos_weight, **params)"""
+    with open(path) as f:
+        return json.load(f)['params']
+
+
+def main():
+    from downsell.training import build_training_set
+
+    parser = argparse.ArgumentParser(description="Tune the down-sell classifier by successive halving")
+    parser.add_argument('months', nargs=3, metavar='MONTH', help="M1, M2, M3 extracts")
+    parser.add_argument('--configs', type=int, default=N_CONFIGS)
+    parser.add_argument('--eta', type=int, default=ETA)
+    parser.add_argument('--budget', type=float, default=None, help="time budget in seconds")
+    parser.add_argument('--out', default=BEST_PARAMS_PATH)
+    args = parser.parse_args()
+
+    X, y, _ = build_training_set(*args.months)
+    result = successive_halving(X, y, sample_configs(args.configs), eta=args.eta,
+                                time_budget=args.budget)
+    save_best(result, args.out)
+    print(result['history'].to_string(index=False))
+    print(f"\nBest AUC {result['auc']:.4f}, F1 {result['f1']:.4f} "
+          f"({result['params']['n_estimators']} trees) in {result['seconds']:.0f} s -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Expected-value targeting with each customer's own ARPU.
+
+The flat simulator values every retained customer at the same VALUE_SAVED.
+Here a retained customer is worth `months` of their own ARPU, and customers
+are ranked by expected saved value p(down-sell) x ARPU.  Contacting customer
+i pays off when effectiveness x p_i x months x ARPU_i > action cost; since
+effectiveness, months and cost are the same for everyone, the ranking does
+not depend on them and is sorted once per scored population (like the
+score index), every campaign being a binary search on it.
+"""
+import numpy as np
+
+from downsell.optimizer import GAIN_CURVE_POINTS
+from downsell.store import down_weights
+
+# Months of ARPU preserved when a down-seller is retained
+VALUE_MONTHS = 12
+
+
+def cumulative_value(population, arpu, order):
+    """
+    Prefix sums along a customer order (cum_x[0] = 0):
+    cum_downs (down-sellers) and cum_arpu (ARPU of the down-sellers), both
+    from the labels when known, from the scores otherwise
+    """
+    arpu = np.clip(np.asarray(arpu, dtype=np.float64), 0, None)[order]
+    weights = np.asarray(down_weights(population), dtype=np.float64)[order]
+    return {
+        'cum_downs': np.concatenate(([0.0], np.cumsum(weights))),
+        'cum_arpu': np.concatenate(([0.0], np.cumsum(weights * arpu)))
+    }
+
+
+def build_value_index(population, arpu):
+    """
+    Expected-value index, built once per scored population.
+
+    keys[i] = -(p x ARPU) of the (i+1)-th customer by expected value (ascending)
+    plus cumulative_value along that order.
+    """
+    expected = np.asarray(population['y_proba'], dtype=np.float64) * \
+        np.clip(np.asarray(arpu, dtype=np.float64), 0, None)
+    order = np.argsort(-expected, kind='stable')
+    index = cumulative_value(population, arpu, order)
+    index.update({
+        'n': len(expected),
+        'keys': -expected[order],
+        'order': order
+    })
+    return index
+
+
+def value_cut(index, k, action_cost, months, effectiveness):
+    """calculate_roi fields when the first k customers of an index are contacted"""
+    k = int(np.clip(k, 0, index['n']))
+    downs = float(index['cum_downs'][k])
+    total_cost = k * action_cost
+    value = float(index['cum_arpu'][k]) * months * effectiveness
+    net_benefit = value - total_cost
+    return {
+        'clients': k,
+        'expected_down': downs,
+        'total_cost': total_cost,
+        'retained': downs * effectiveness,
+        'value_saved': value,
+        'net_benefit': net_benefit,
+        'roi': (net_benefit / total_cost * 100) if total_cost > 0 else 0,
+        'down_rate': downs / k if k else 0.0,
+        'pct_clients': k / index['n'] * 100 if index['n'] else 0.0
+    }
+
+
+def value_optimum(index, action_cost, months, effectiveness):
+    """
+    Campaign contacting every customer whose expected saved value exceeds
+    the action cost.  'min_expected_value' is that of the last one contacted.
+    """
+    break_even = action_cost / (effectiveness * months)
+    k = int(np.searchsorted(index['keys'], -break_even, side='left'))
+    cut = value_cut(index, k, action_cost, months, effectiveness)
+    cut['min_expected_value'] = -float(index['keys'][k - 1]) * months * effectiveness if k else 0.0
+    return cut
+
+
+def value_gain_curve(index, n_points=GAIN_CURVE_POINTS):
+    """Cumulative down-sellers and ARPU at n_points top-K cuts of an index"""
+    n = len(index['cum_arpu']) - 1
+    k = np.unique(np.linspace(0, n, n_points + 1).round().astype(np.int64))
+    return {
+        'n': n,
+        'k': k,
+        'downs': index['cum_downs'][k],
+        'arpu': index['cum_arpu'][k]
+    }
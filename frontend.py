@@ -1,3 +1,7 @@
+import os
+import shutil
+import uuid
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,6 +9,21 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from downsell.allocation import DEFAULT_ACTIONS, allocate, allocation_summary, allocation_targets
+from downsell.cube import SERVICE_FLAGS, cube_path, load_cube, segment_breakdown, segment_totals
+from downsell.drift import PSI_ALERT, PSI_WARNING, load_json, report_frame
+from downsell.economics import calculate_roi, calculate_roi_grid
+from downsell.export import EXPORT_FORMATS, cleanup_exports, write_target_list
+from downsell.optimizer import build_gain_curve, optimal_cutoffs, sensitivity_surface
+from downsell.profiling import StageLog
+from downsell.render import histogram, lttb
+from downsell.store import load_scored_population, store_version, global_stats
+from downsell.value import VALUE_MONTHS, build_value_index, cumulative_value, value_cut, value_gain_curve, value_optimum
+from downsell.score_index import (
+    build_score_index, cut_at_threshold, cut_top_k,
+    decile_positions, decile_table, threshold_table
+)
+
 # ============================================================
 # PAGE CONFIGURATION - ORANGE BRAND COLORS
 # ============================================================
@@ -25,8 +44,10 @@ GRAY_LIGHT = "#F5F5F5"
 GRAY_MEDIUM = "#E0E0E0"
 GRAY_DARK = "#333333"
 
-# Custom CSS for Orange theme
-st.markdown(f"""
+# Custom CSS for Orange theme (built once per server process)
+@st.cache_resource
+def theme_css():
+    return f"""
 <style>
     /* Main background */
     .stApp {{
@@ -139,7 +160,9 @@ st.markdown(f"""
         margin: 0;
     }}
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(theme_css(), unsafe_allow_html=True)
 
 # ============================================================
 # TITLE AND INTRODUCTION
@@ -153,42 +176,471 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # ============================================================
-# LOAD STATIC DATA (YOUR STATISTICS)
+# LOAD SCORED POPULATION
 # ============================================================
 
+# Directory of .npy files (or a .parquet file) written by save_scored_population
+SCORES_PATH = os.environ.get("DOWNSELL_SCORES_PATH", "scored_population")
+# Target lists are written here before download
+EXPORT_DIR = os.environ.get("DOWNSELL_EXPORT_DIR", "exports")
+# Session export directories untouched for longer than this are deleted
+EXPORT_MAX_AGE_HOURS = float(os.environ.get("DOWNSELL_EXPORT_MAX_AGE_HOURS", "24"))
+# Larger target lists are only written on the server: a download button
+# holds the whole file in the Streamlit server's memory until the session ends
+DOWNLOAD_MAX_MB = float(os.environ.get("DOWNSELL_DOWNLOAD_MAX_MB", "50"))
+# Latest report of `python -m downsell.drift`
+DRIFT_REPORT_PATH = os.environ.get("DOWNSELL_DRIFT_REPORT", "models/drift_report.json")
+# Stage timings of every rerun are appended here (JSON lines) when set
+PROFILE_LOG = os.environ.get("DOWNSELL_PROFILE_LOG")
+# Stage timing panel in the sidebar (also with ?debug=1 in the URL)
+DEBUG = os.environ.get("DOWNSELL_DEBUG", "0") == "1" or st.query_params.get("debug") == "1"
+
+# Wall time, CPU time and peak memory of each section of this rerun
+profiler = StageLog(PROFILE_LOG)
+
+@st.cache_resource
+def load_population(path, version):
+    # Memory-mapped, shared by every session of the server
+    return load_scored_population(path)
+
+@st.cache_resource
+def load_index(path, version):
+    # Sorted scores + cumulative downs, built once per scored population
+    with profiler.stage("decile"):
+        return build_score_index(load_population(path, version))
+
+@st.cache_resource
+def load_gain_curve(path, version):
+    # Fixed-size gain curve used by the optimizer
+    return build_gain_curve(load_index(path, version))
+
 @st.cache_data
-def load_data():
-    # Global statistics
-    total_clients = 857_141
-    total_test = 171_429
-    taux_down_global = 0.4041  # 40.41%
-    
-    # Decile data (from your analysis)
-    deciles_data = pd.DataFrame({
-        'decile': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
-        'clients': [17142, 17142, 17142, 17142, 17142, 17142, 17142, 17142, 17142, 17151],
-        'downs': [15687, 10827, 8948, 7729, 6799, 5836, 4840, 3929, 2946, 1729],
-        'rate': [0.9151, 0.6316, 0.5220, 0.4509, 0.3966, 0.3405, 0.2823, 0.2292, 0.1719, 0.1008],
-        'lift': [2.265, 1.563, 1.292, 1.116, 0.982, 0.843, 0.699, 0.567, 0.425, 0.249]
-    })
-    
-    # Predefined thresholds
-    thresholds_data = pd.DataFrame({
-        'threshold': [0.3, 0.4, 0.423, 0.5, 0.6, 0.7],
-        'targeted_clients': [129296, 101454, 95000, 78705, 54280, 29634],
-        'pct_clients': [75.4, 59.2, 55.4, 45.9, 31.7, 17.3],
-        'targeted_downs': [61462, 53705, 50000, 45773, 35163, 22377]
-    })
+def load_data(path, version):
+    population = load_population(path, version)
+    index = load_index(path, version)
+    stats = global_stats(population)
     
     return {
-        'total_clients': total_clients,
-        'total_test': total_test,
-        'global_down_rate': taux_down_global,
-        'deciles': deciles_data,
-        'thresholds': thresholds_data
+        'total_clients': stats['total_clients'],
+        'total_test': stats['total_test'],
+        'global_down_rate': stats['global_down_rate'],
+        'deciles': decile_table(index),
+        'thresholds': threshold_table(index)
+    }
+
+if not os.path.exists(SCORES_PATH):
+    st.error(
+        f"Scored population not found at `{SCORES_PATH}`. "
+        "Export it from the notebook with `save_scored_population` "
+        "or set DOWNSELL_SCORES_PATH."
+    )
+    st.stop()
+
+scores_version = store_version(SCORES_PATH)
+with profiler.stage("load"):
+    data = load_data(SCORES_PATH, scores_version)
+
+# ============================================================
+# SCENARIO CACHE
+# ============================================================
+# Results of each mode are cached per (scored population, action_cost,
+# value_saved, effectiveness, selection) and the Plotly figures separately,
+# both in bounded LRU caches shared by every session of the server: a
+# revisited slider position is served without recomputing or rebuilding.
+
+SCENARIO_CACHE_SIZE = 512
+FIGURE_CACHE_SIZE = 128
+# Allocations hold one action per customer: only the last few are kept
+ALLOCATION_CACHE_SIZE = 8
+
+# Customer-level data is reduced on the server: histograms and LTTB
+# curves of fixed size, whatever the size of the population
+CURVE_POINTS = 1000
+SCORE_BINS = 100
+
+# Sensitivity grid of the optimizer (effectiveness x cost x value saved)
+EFF_AXIS = np.arange(1, 31) / 100
+COST_AXIS = np.arange(100, 1001, 50)
+VALUE_AXIS = np.arange(5000, 50001, 1000)
+
+@st.cache_data(max_entries=SCENARIO_CACHE_SIZE)
+def economic_optimum(path, version, action_cost, value_saved, effectiveness, min_clients=1):
+    return optimal_cutoffs(
+        load_gain_curve(path, version), action_cost, value_saved, effectiveness,
+        min_clients=min_clients
+    )
+
+@st.cache_data(max_entries=SCENARIO_CACHE_SIZE)
+def decile_scenario(path, version, action_cost, value_saved, effectiveness, deciles):
+    table = load_data(path, version)['deciles']
+    filtered = table[table['decile'].isin(deciles)]
+    total_clients = int(filtered['clients'].sum())
+    down_rate = filtered['downs'].sum() / total_clients
+    results = calculate_roi(total_clients, down_rate, action_cost, value_saved, effectiveness)
+    results['down_rate'] = down_rate
+    return results
+
+@st.cache_data(max_entries=SCENARIO_CACHE_SIZE)
+def threshold_scenario(path, version, action_cost, value_saved, effectiveness, cut_mode, cut_value):
+    index = load_index(path, version)
+    if cut_mode == "Probability threshold":
+        cut = cut_at_threshold(index, cut_value)
+    else:
+        cut = cut_top_k(index, cut_value)
+    f1_cut = cut_at_threshold(index, 0.423)
+    return {
+        'cut': cut,
+        'results': calculate_roi(cut['targeted_clients'], cut['down_rate'],
+                                 action_cost, value_saved, effectiveness),
+        'f1_optimal': calculate_roi(f1_cut['targeted_clients'], f1_cut['down_rate'],
+                                    action_cost, value_saved, effectiveness),
+        'net_benefit_optimal': economic_optimum(path, version, action_cost, value_saved,
+                                                effectiveness)['max_net_benefit']
     }
 
-data = load_data()
+@st.cache_resource
+def load_value_index(path, version):
+    # Customers ranked by p(down-sell) x ARPU, built once per scored population
+    population = load_population(path, version)
+    return build_value_index(population, population['arpu'])
+
+@st.cache_resource
+def load_score_value(path, version):
+    # ARPU of the down-sellers along the score ranking, for comparison
+    population = load_population(path, version)
+    index = cumulative_value(population, population['arpu'], load_index(path, version)['order'])
+    index['n'] = len(population['y_proba'])
+    return index
+
+@st.cache_data(max_entries=SCENARIO_CACHE_SIZE)
+def value_scenario(path, version, action_cost, months, effectiveness):
+    best = value_optimum(load_value_index(path, version), action_cost, months, effectiveness)
+    return {
+        'optimum': best,
+        'score_ranking': value_cut(load_score_value(path, version), best['clients'],
+                                   action_cost, months, effectiveness)
+    }
+
+def customer_values(path, version, value_saved, months):
+    # Value of a retained customer: months of their ARPU when known, flat otherwise
+    population = load_population(path, version)
+    if months and population['arpu'] is not None:
+        return np.asarray(population['arpu'], dtype=np.float64) * months
+    return value_saved
+
+@st.cache_resource(max_entries=ALLOCATION_CACHE_SIZE)
+def campaign_allocation(path, version, actions, budget, value_saved, months):
+    # actions: tuple of (name, cost, effectiveness)
+    actions = [{'name': n, 'cost': c, 'effectiveness': e} for n, c, e in actions]
+    population = load_population(path, version)
+    values = customer_values(path, version, value_saved, months)
+    allocation = allocate(population['y_proba'], values, actions, budget)
+    allocation['summary'] = allocation_summary(allocation, population, values, actions)
+    return allocation
+
+@st.cache_resource
+def load_segments(path, version):
+    # Aggregate cube written next to the scored population (a few thousand rows)
+    return load_cube(path)
+
+@st.cache_data(max_entries=SCENARIO_CACHE_SIZE)
+def segment_scenario(path, version, action_cost, value_saved, effectiveness, filters):
+    totals = segment_totals(load_segments(path, version), dict(filters))
+    results = calculate_roi(totals['clients'], totals['down_rate'],
+                            action_cost, value_saved, effectiveness)
+    results['down_rate'] = totals['down_rate']
+    results['mean_score'] = totals['mean_score']
+    return results
+
+@st.cache_resource
+def load_sensitivity(path, version):
+    # Optimal campaign at every grid point; independent of the sliders
+    curve = load_gain_curve(path, version)
+    with profiler.stage("roi"):
+        return sensitivity_surface(
+            curve,
+            COST_AXIS[None, :, None],
+            VALUE_AXIS[None, None, :],
+            EFF_AXIS[:, None, None]
+        )
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def decile_figure(path, version):
+    data = load_data(path, version)
+    fig = px.bar(
+        data['deciles'],
+        x='decile',
+        y='rate',
+        title="Down-sell Rate by Decile",
+        labels={'rate': 'Down-sell Rate', 'decile': 'Decile'},
+        color='rate',
+        color_continuous_scale=[[0, WHITE], [1, ORANGE_PRIMARY]]
+    )
+    fig.add_hline(
+        y=data['global_down_rate'],
+        line_dash="dash",
+        line_color=BLACK,
+        annotation_text=f"Average: {data['global_down_rate']*100:.1f}%"
+    )
+    fig.update_layout(
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def threshold_figure(path, version, action_cost, value_saved, effectiveness):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # ROI on a fine threshold grid (one vectorized call)
+    curve = threshold_table(load_index(path, version), np.round(np.arange(0.05, 0.96, 0.01), 2))
+    rois = calculate_roi_grid(
+        curve['targeted_clients'],
+        curve['targeted_downs'] / curve['targeted_clients'].clip(lower=1),
+        action_cost, value_saved, effectiveness
+    )['roi']
+
+    fig.add_trace(
+        go.Scatter(
+            x=curve['threshold'],
+            y=rois,
+            mode='lines+markers',
+            name='ROI',
+            line=dict(color=ORANGE_PRIMARY, width=3),
+            marker=dict(color=ORANGE_DARK, size=4)
+        ),
+        secondary_y=False
+    )
+
+    fig.add_trace(
+        go.Bar(
+            x=curve['threshold'],
+            y=curve['targeted_clients'],
+            name='Targeted Clients',
+            marker_color=ORANGE_LIGHT,
+            opacity=0.6
+        ),
+        secondary_y=True
+    )
+
+    fig.update_layout(
+        title="ROI and Targeting Volume by Threshold",
+        xaxis_title="Threshold",
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK,
+        hovermode='x unified'
+    )
+    fig.update_yaxes(title_text="ROI (%)", secondary_y=False, gridcolor=GRAY_MEDIUM)
+    fig.update_yaxes(title_text="Targeted Clients", secondary_y=True, gridcolor=GRAY_MEDIUM)
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def net_benefit_figure(path, version, action_cost, value_saved, effectiveness, min_clients):
+    curve = load_gain_curve(path, version)
+    best = economic_optimum(path, version, action_cost, value_saved, effectiveness, min_clients)
+
+    k = curve['k']
+    curve_roi = calculate_roi_grid(
+        k, curve['downs'] / np.maximum(k, 1),
+        action_cost, value_saved, effectiveness
+    )
+    pct_targeted, net_benefit = lttb(k / curve['n'] * 100, curve_roi['net_benefit'], CURVE_POINTS)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=pct_targeted,
+        y=net_benefit,
+        mode='lines',
+        name='Net Benefit',
+        line=dict(color=ORANGE_PRIMARY, width=3)
+    ))
+    fig.add_vline(
+        x=best['max_net_benefit']['pct_clients'],
+        line_dash="dash", line_color=BLACK,
+        annotation_text="Max net benefit"
+    )
+    fig.add_vline(
+        x=best['max_roi']['pct_clients'],
+        line_dash="dot", line_color=ORANGE_DARK,
+        annotation_text="Max ROI"
+    )
+    fig.update_layout(
+        title="Net Benefit by Share of Customers Targeted (descending score)",
+        xaxis_title="% of sample targeted",
+        yaxis_title="Net Benefit (FCFA)",
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def score_distribution_figure(path, version):
+    population = load_population(path, version)
+    y_proba = population['y_proba']
+    y_true = population['y_true']
+
+    fig = go.Figure()
+    if y_true is None:
+        groups = [("All customers", None, ORANGE_PRIMARY)]
+    else:
+        groups = [("Stable", 1 - np.asarray(y_true, dtype=np.float64), GRAY_DARK),
+                  ("Down-sellers", y_true, ORANGE_PRIMARY)]
+    for name, weights, color in groups:
+        hist = histogram(y_proba, bins=SCORE_BINS, range=(0.0, 1.0), weights=weights)
+        fig.add_trace(go.Bar(
+            x=hist['centers'],
+            y=hist['counts'],
+            name=name,
+            marker_color=color,
+            opacity=0.6
+        ))
+    fig.update_layout(
+        title="Score Distribution",
+        xaxis_title="Down-sell probability",
+        yaxis_title="Customers",
+        barmode='overlay',
+        bargap=0,
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def sensitivity_heatmap(path, version, value_slice, action_cost, effectiveness):
+    surface = load_sensitivity(path, version)
+    fig = go.Figure(go.Heatmap(
+        x=COST_AXIS,
+        y=EFF_AXIS * 100,
+        z=surface['roi']['net_benefit'][:, :, value_slice],
+        colorscale=[[0, WHITE], [1, ORANGE_PRIMARY]],
+        colorbar=dict(title="FCFA")
+    ))
+    fig.add_trace(go.Scatter(
+        x=[action_cost], y=[effectiveness * 100],
+        mode='markers', name='Current settings',
+        marker=dict(color=BLACK, size=12, symbol='x')
+    ))
+    fig.update_layout(
+        title=f"Optimal Net Benefit (value saved = {VALUE_AXIS[value_slice]:,} FCFA)",
+        xaxis_title="Cost per action (FCFA)",
+        yaxis_title="Effectiveness (%)",
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def sensitivity_3d(path, version, value_slice):
+    surface = load_sensitivity(path, version)
+    fig = go.Figure(go.Surface(
+        x=COST_AXIS,
+        y=EFF_AXIS * 100,
+        z=surface['roi']['roi'][:, :, value_slice],
+        colorscale=[[0, WHITE], [1, ORANGE_PRIMARY]],
+        colorbar=dict(title="ROI (%)")
+    ))
+    fig.update_layout(
+        title=f"ROI of the Optimal Campaign (value saved = {VALUE_AXIS[value_slice]:,} FCFA)",
+        scene=dict(
+            xaxis_title="Cost per action (FCFA)",
+            yaxis_title="Effectiveness (%)",
+            zaxis_title="ROI (%)"
+        ),
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def value_figure(path, version, action_cost, months, effectiveness):
+    best = value_scenario(path, version, action_cost, months, effectiveness)['optimum']
+    
+    fig = go.Figure()
+    for name, index, color in [("Expected value (p x ARPU)", load_value_index(path, version), ORANGE_PRIMARY),
+                               ("Score only", load_score_value(path, version), GRAY_DARK)]:
+        curve = value_gain_curve(index)
+        net_benefit = curve['arpu'] * months * effectiveness - curve['k'] * action_cost
+        fig.add_trace(go.Scatter(
+            x=curve['k'] / curve['n'] * 100,
+            y=net_benefit,
+            mode='lines',
+            name=name,
+            line=dict(color=color, width=3)
+        ))
+    fig.add_vline(
+        x=best['pct_clients'],
+        line_dash="dash", line_color=BLACK,
+        annotation_text="Expected value > cost"
+    )
+    fig.update_layout(
+        title="Net Benefit by Share of Customers Targeted",
+        xaxis_title="% of sample targeted",
+        yaxis_title="Net Benefit (FCFA)",
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_data
+def load_drift_report(path, version):
+    return load_json(path)
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def drift_figure(path, version):
+    table = report_frame(load_drift_report(path, version))
+    fig = px.bar(
+        table,
+        x='psi',
+        y='column',
+        orientation='h',
+        title="Population Stability Index vs Training Reference",
+        labels={'psi': 'PSI', 'column': ''},
+        hover_data=['ks', 'status'],
+        color='psi',
+        color_continuous_scale=[[0, WHITE], [1, ORANGE_PRIMARY]]
+    )
+    fig.add_vline(x=PSI_WARNING, line_dash="dot", line_color=GRAY_DARK, annotation_text="Moderate shift")
+    fig.add_vline(x=PSI_ALERT, line_dash="dash", line_color=BLACK, annotation_text="Major shift")
+    fig.update_layout(
+        yaxis=dict(autorange='reversed'),
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def segment_figure(path, version, dim, filters, global_down_rate):
+    table = segment_breakdown(load_segments(path, version), dim, dict(filters))
+    table[dim] = table[dim].astype(str)
+    fig = px.bar(
+        table,
+        x=dim,
+        y='down_rate',
+        title=f"Down-sell Rate by {dim}",
+        labels={'down_rate': 'Down-sell Rate', dim: dim},
+        hover_data=['clients', 'downs', 'lift'],
+        color='down_rate',
+        color_continuous_scale=[[0, WHITE], [1, ORANGE_PRIMARY]]
+    )
+    fig.add_hline(
+        y=global_down_rate,
+        line_dash="dash",
+        line_color=BLACK,
+        annotation_text=f"Average: {global_down_rate*100:.1f}%"
+    )
+    fig.update_layout(
+        plot_bgcolor=WHITE,
+        paper_bgcolor=WHITE,
+        font_color=BLACK
+    )
+    return fig
 
 # ============================================================
 # SIDEBAR - SIMULATION PARAMETERS
@@ -228,7 +680,7 @@ with st.sidebar:
     st.markdown("###  Targeting Mode")
     target_mode = st.radio(
         "Select mode",
-        ["By Decile", "By Threshold", "Custom"],
+        ["By Decile", "By Threshold", "Optimizer", "Expected Value", "Campaign Budget", "Segments", "Custom"],
         index=0
     )
     
@@ -247,27 +699,6 @@ with st.sidebar:
 # HELPER FUNCTIONS
 # ============================================================
 
-def calculate_roi(clients, down_rate, cost_per_action, value_saved, effectiveness):
-    """
-    Calculate ROI for a given segment
-    """
-    expected_down = clients * down_rate
-    total_cost = clients * cost_per_action
-    retained = expected_down * effectiveness
-    value = retained * value_saved
-    net_benefit = value - total_cost
-    roi = (net_benefit / total_cost * 100) if total_cost > 0 else 0
-    
-    return {
-        'clients': clients,
-        'expected_down': expected_down,
-        'total_cost': total_cost,
-        'retained': retained,
-        'value_saved': value,
-        'net_benefit': net_benefit,
-        'roi': roi
-    }
-
 def metric_card(label, value, help_text=""):
     """Custom metric card with Orange styling"""
     return f"""
@@ -282,6 +713,7 @@ def metric_card(label, value, help_text=""):
 # GLOBAL KPIS
 # ============================================================
 
+section = profiler.begin("kpis", rows=data['total_test'])
 st.markdown("###  Key Indicators")
 
 col1, col2, col3, col4 = st.columns(4)
@@ -309,7 +741,8 @@ with col3:
     ), unsafe_allow_html=True)
 
 with col4:
-    roi_d1 = calculate_roi(17142, 0.9151, action_cost, value_saved, effectiveness)['roi']
+    d1 = data['deciles'].iloc[0]
+    roi_d1 = calculate_roi(d1['clients'], d1['rate'], action_cost, value_saved, effectiveness)['roi']
     st.markdown(metric_card(
         "Max ROI Possible",
         f"{roi_d1:.0f}%",
@@ -317,6 +750,12 @@ with col4:
     ), unsafe_allow_html=True)
 
 st.markdown("<hr>", unsafe_allow_html=True)
+profiler.end(section)
+
+# Customers targeted by the current mode, for the export section:
+# (file name, function returning (positions, extra columns)) or None
+export_target = None
+section = profiler.begin("mode", mode=target_mode)
 
 # ============================================================
 # MODE 1: BY DECILE
@@ -334,18 +773,16 @@ if target_mode == "By Decile":
     )
     
     if selected_deciles:
-        # Filter selected deciles
-        filtered = data['deciles'][data['deciles']['decile'].isin(selected_deciles)]
-        
-        # Cumulative calculations
-        total_clients = filtered['clients'].sum()
-        total_downs = filtered['downs'].sum()
-        avg_rate = total_downs / total_clients
-        
-        # Calculate ROI
-        results = calculate_roi(
-            total_clients, avg_rate,
-            action_cost, value_saved, effectiveness
+        # Cumulative calculations and ROI of the selected deciles
+        results = decile_scenario(
+            SCORES_PATH, scores_version,
+            action_cost, value_saved, effectiveness,
+            tuple(sorted(selected_deciles))
+        )
+        avg_rate = results['down_rate']
+        export_target = (
+            "deciles_" + "-".join(str(d) for d in sorted(selected_deciles)),
+            lambda: (decile_positions(load_index(SCORES_PATH, scores_version), selected_deciles), None)
         )
         
         # Results in columns
@@ -390,27 +827,7 @@ if target_mode == "By Decile":
         """, unsafe_allow_html=True)
         
         # Decile chart
-        fig = px.bar(
-            data['deciles'],
-            x='decile',
-            y='rate',
-            title="Down-sell Rate by Decile",
-            labels={'rate': 'Down-sell Rate', 'decile': 'Decile'},
-            color='rate',
-            color_continuous_scale=[[0, WHITE], [1, ORANGE_PRIMARY]]
-        )
-        fig.add_hline(
-            y=data['global_down_rate'],
-            line_dash="dash",
-            line_color=BLACK,
-            annotation_text=f"Average: {data['global_down_rate']*100:.1f}%"
-        )
-        fig.update_layout(
-            plot_bgcolor=WHITE,
-            paper_bgcolor=WHITE,
-            font_color=BLACK
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(decile_figure(SCORES_PATH, scores_version), use_container_width=True)
 
 # ============================================================
 # MODE 2: BY THRESHOLD
@@ -419,25 +836,56 @@ if target_mode == "By Decile":
 elif target_mode == "By Threshold":
     st.markdown("###  Threshold Analysis")
     
-    # Threshold selector
-    threshold = st.slider(
-        "Select probability threshold",
-        min_value=0.0, max_value=1.0, value=0.7, step=0.05
+    cut_mode = st.radio(
+        "Cut by",
+        ["Probability threshold", "Top clients"],
+        horizontal=True
     )
     
-    # Find closest threshold in data
-    thresholds = data['thresholds']['threshold'].tolist()
-    closest = min(thresholds, key=lambda x: abs(x - threshold))
-    
-    # Get data for this threshold
-    threshold_data = data['thresholds'][data['thresholds']['threshold'] == closest].iloc[0]
+    # Exact cut from the score index (binary search, no snapping)
+    if cut_mode == "Probability threshold":
+        cut_value = st.slider(
+            "Select probability threshold",
+            min_value=0.0, max_value=1.0, value=0.7, step=0.01
+        )
+    else:
+        cut_value = st.slider(
+            "Number of top-scored clients",
+            min_value=0, max_value=data['total_test'],
+            value=min(data['total_test'], int(data['deciles']['clients'].iloc[:3].sum())),
+            step=max(data['total_test'] // 1000, 1)
+        )
     
-    # Calculate ROI
-    results = calculate_roi(
-        threshold_data['targeted_clients'],
-        threshold_data['targeted_downs'] / threshold_data['targeted_clients'],
-        action_cost, value_saved, effectiveness
+    scenario = threshold_scenario(
+        SCORES_PATH, scores_version,
+        action_cost, value_saved, effectiveness,
+        cut_mode, cut_value
+    )
+    cut = scenario['cut']
+    export_target = (
+        f"top_{cut['targeted_clients']}",
+        lambda: (load_index(SCORES_PATH, scores_version)['order'][:cut['targeted_clients']], None)
     )
+    results = scenario['results']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown(metric_card(
+            "Targeted Clients",
+            f"{cut['targeted_clients']:,}",
+            f"{cut['pct_clients']:.1f}% of sample, score ≥ {cut['threshold']:.3f}"
+        ), unsafe_allow_html=True)
+    with col2:
+        st.markdown(metric_card(
+            "Down-sellers Targeted",
+            f"{cut['targeted_downs']:,.0f}",
+            f"{cut['down_rate']*100:.1f}% down-sell rate"
+        ), unsafe_allow_html=True)
+    with col3:
+        st.markdown(metric_card("Net Benefit", f"{results['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
+    with col4:
+        st.markdown(metric_card("ROI", f"{results['roi']:.1f}%"), unsafe_allow_html=True)
     
     # Two-column comparison of optimal thresholds
     st.markdown("###  Optimal Thresholds Comparison")
@@ -450,12 +898,7 @@ elif target_mode == "By Threshold":
             <h4 style='color: {BLACK};'>🔵 Threshold 0.423 (F1 Optimal)</h4>
         """, unsafe_allow_html=True)
         
-        t423 = data['thresholds'][data['thresholds']['threshold'] == 0.423].iloc[0]
-        r423 = calculate_roi(
-            t423['targeted_clients'],
-            t423['targeted_downs'] / t423['targeted_clients'],
-            action_cost, value_saved, effectiveness
-        )
+        r423 = scenario['f1_optimal']
         
         st.markdown(metric_card("Targeted Clients", f"{r423['clients']:,}"), unsafe_allow_html=True)
         st.markdown(metric_card("Net Benefit", f"{r423['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
@@ -463,74 +906,303 @@ elif target_mode == "By Threshold":
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
+        # Solved for the current economic settings
+        r_opt = scenario['net_benefit_optimal']
+        
         st.markdown(f"""
         <div style='background-color: {GRAY_LIGHT}; padding: 15px; border-radius: 5px; border-left: 4px solid {ORANGE_PRIMARY};'>
-            <h4 style='color: {BLACK};'>🟢 Threshold 0.7 (ROI Optimal)</h4>
+            <h4 style='color: {BLACK};'>🟢 Threshold {r_opt['threshold']:.3f} (Net Benefit Optimal)</h4>
         """, unsafe_allow_html=True)
         
-        t7 = data['thresholds'][data['thresholds']['threshold'] == 0.7].iloc[0]
-        r7 = calculate_roi(
-            t7['targeted_clients'],
-            t7['targeted_downs'] / t7['targeted_clients'],
-            action_cost, value_saved, effectiveness
-        )
-        
-        st.markdown(metric_card("Targeted Clients", f"{r7['clients']:,}"), unsafe_allow_html=True)
-        st.markdown(metric_card("Net Benefit", f"{r7['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
-        st.markdown(metric_card("ROI", f"{r7['roi']:.1f}%"), unsafe_allow_html=True)
+        st.markdown(metric_card("Targeted Clients", f"{r_opt['clients']:,}"), unsafe_allow_html=True)
+        st.markdown(metric_card("Net Benefit", f"{r_opt['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
+        st.markdown(metric_card("ROI", f"{r_opt['roi']:.1f}%"), unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
     
     # ROI vs Threshold chart
-    fig = make_subplots(specs=[[{"secondary_y": True}]])
-    
-    # Calculate ROI for all thresholds
-    rois = []
-    for _, row in data['thresholds'].iterrows():
-        r = calculate_roi(
-            row['targeted_clients'],
-            row['targeted_downs'] / row['targeted_clients'],
-            action_cost, value_saved, effectiveness
-        )
-        rois.append(r['roi'])
+    st.plotly_chart(
+        threshold_figure(SCORES_PATH, scores_version, action_cost, value_saved, effectiveness),
+        use_container_width=True
+    )
+
+# ============================================================
+# MODE 3: OPTIMIZER
+# ============================================================
+
+elif target_mode == "Optimizer":
+    st.markdown("###  ROI-Optimal Targeting")
     
-    fig.add_trace(
-        go.Scatter(
-            x=data['thresholds']['threshold'],
-            y=rois,
-            mode='lines+markers',
-            name='ROI',
-            line=dict(color=ORANGE_PRIMARY, width=3),
-            marker=dict(color=ORANGE_DARK, size=8)
-        ),
-        secondary_y=False
+    min_share = st.slider(
+        "Minimum target size for the ROI optimum (% of sample)",
+        min_value=0.5, max_value=20.0, value=5.0, step=0.5,
+        help="ROI alone always favours the smallest target; this sets a floor"
     )
     
-    fig.add_trace(
-        go.Bar(
-            x=data['thresholds']['threshold'],
-            y=data['thresholds']['targeted_clients'],
-            name='Targeted Clients',
-            marker_color=ORANGE_LIGHT,
-            opacity=0.6
-        ),
-        secondary_y=True
+    min_clients = int(data['total_test'] * min_share / 100)
+    best = economic_optimum(
+        SCORES_PATH, scores_version,
+        action_cost, value_saved, effectiveness, min_clients
+    )
+    export_target = (
+        f"max_net_benefit_top_{best['max_net_benefit']['clients']}",
+        lambda: (load_index(SCORES_PATH, scores_version)['order'][:best['max_net_benefit']['clients']], None)
     )
     
-    fig.update_layout(
-        title="ROI and Targeting Volume by Threshold",
-        xaxis_title="Threshold",
-        plot_bgcolor=WHITE,
-        paper_bgcolor=WHITE,
-        font_color=BLACK,
-        hovermode='x unified'
+    col1, col2 = st.columns(2)
+    
+    for col, key, title in [(col1, 'max_net_benefit', "Maximum Net Benefit"),
+                            (col2, 'max_roi', "Maximum ROI")]:
+        cut = best[key]
+        with col:
+            st.markdown(f"""
+            <div style='background-color: {GRAY_LIGHT}; padding: 15px; border-radius: 5px; border-left: 4px solid {ORANGE_PRIMARY};'>
+                <h4 style='color: {BLACK};'>{title}: score ≥ {cut['threshold']:.3f}</h4>
+            </div>
+            """, unsafe_allow_html=True)
+            st.markdown(metric_card(
+                "Targeted Clients",
+                f"{cut['clients']:,}",
+                f"{cut['pct_clients']:.1f}% of sample"
+            ), unsafe_allow_html=True)
+            st.markdown(metric_card("Net Benefit", f"{cut['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
+            st.markdown(metric_card("ROI", f"{cut['roi']:.1f}%"), unsafe_allow_html=True)
+    
+    # Net benefit along the gain curve
+    st.plotly_chart(
+        net_benefit_figure(SCORES_PATH, scores_version,
+                           action_cost, value_saved, effectiveness, min_clients),
+        use_container_width=True
     )
-    fig.update_yaxes(title_text="ROI (%)", secondary_y=False, gridcolor=GRAY_MEDIUM)
-    fig.update_yaxes(title_text="Targeted Clients", secondary_y=True, gridcolor=GRAY_MEDIUM)
     
-    st.plotly_chart(fig, use_container_width=True)
+    # Sensitivity of the optimal campaign (re-solved at every grid point)
+    st.markdown("###  Sensitivity Analysis")
+    
+    value_slice = int(np.argmin(np.abs(VALUE_AXIS - value_saved)))
+    
+    tab_2d, tab_3d = st.tabs([" Net Benefit (2D)", " ROI Surface (3D)"])
+    
+    with tab_2d:
+        st.plotly_chart(
+            sensitivity_heatmap(SCORES_PATH, scores_version, value_slice, action_cost, effectiveness),
+            use_container_width=True
+        )
+    
+    with tab_3d:
+        st.plotly_chart(sensitivity_3d(SCORES_PATH, scores_version, value_slice), use_container_width=True)
+
+# ============================================================
+# MODE 4: EXPECTED VALUE
+# ============================================================
+
+elif target_mode == "Expected Value":
+    st.markdown("###  Expected-Value Targeting")
+    
+    population = load_population(SCORES_PATH, scores_version)
+    if population['arpu'] is None:
+        st.info(
+            "The scored population has no ARPU column. "
+            "Export it with `save_scored_population(..., arpu=...)`."
+        )
+    else:
+        months = st.slider(
+            "Months of ARPU saved per retained customer",
+            min_value=1, max_value=24, value=VALUE_MONTHS, step=1,
+            help="Replaces the flat customer value: each retained customer is worth this many months of their own ARPU"
+        )
+        
+        scenario = value_scenario(SCORES_PATH, scores_version, action_cost, months, effectiveness)
+        best = scenario['optimum']
+        flat = scenario['score_ranking']
+        export_target = (
+            f"expected_value_top_{best['clients']}",
+            lambda: (load_value_index(SCORES_PATH, scores_version)['order'][:best['clients']], None)
+        )
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown(metric_card(
+                "Targeted Clients",
+                f"{best['clients']:,}",
+                f"{best['pct_clients']:.1f}% of sample"
+            ), unsafe_allow_html=True)
+        with col2:
+            st.markdown(metric_card(
+                "Value Saved",
+                f"{best['value_saved']:,.0f} FCFA",
+                f"{best['down_rate']*100:.1f}% down-sell rate"
+            ), unsafe_allow_html=True)
+        with col3:
+            st.markdown(metric_card("Net Benefit", f"{best['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
+        with col4:
+            st.markdown(metric_card("ROI", f"{best['roi']:.1f}%"), unsafe_allow_html=True)
+        
+        st.markdown(f"""
+        <div style='background-color: {GRAY_LIGHT}; padding: 15px; border-radius: 5px; border-left: 4px solid {ORANGE_PRIMARY}; margin-top: 20px;'>
+            Every customer whose expected saved value (score x {months} months of ARPU x {effectiveness*100:.0f}%)
+            exceeds the {action_cost} FCFA action cost is contacted.
+            The same number of customers taken by score alone would save
+            <strong>{flat['value_saved']:,.0f} FCFA</strong> (net benefit {flat['net_benefit']:,.0f} FCFA).
+        </div>
+        """, unsafe_allow_html=True)
+        
+        st.plotly_chart(
+            value_figure(SCORES_PATH, scores_version, action_cost, months, effectiveness),
+            use_container_width=True
+        )
+
+# ============================================================
+# MODE 5: CAMPAIGN BUDGET
+# ============================================================
+
+elif target_mode == "Campaign Budget":
+    st.markdown("###  Budget Allocation Across Actions")
+    
+    # Catalogue of retention actions; the sidebar cost / effectiveness are not used here
+    actions_table = st.data_editor(
+        pd.DataFrame(DEFAULT_ACTIONS),
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'name': st.column_config.TextColumn("Action"),
+            'cost': st.column_config.NumberColumn("Cost (FCFA)", min_value=1, step=10),
+            'effectiveness': st.column_config.NumberColumn("Effectiveness", min_value=0.0, max_value=1.0, step=0.01)
+        }
+    ).dropna()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        budget = st.number_input(
+            "Campaign budget (FCFA)",
+            min_value=0, value=5_000_000, step=100_000
+        )
+    
+    with col2:
+        population = load_population(SCORES_PATH, scores_version)
+        value_options = ["Flat (sidebar)"] + ([f"{VALUE_MONTHS} months of ARPU"] if population['arpu'] is not None else [])
+        value_mode = st.radio("Customer value", value_options, horizontal=True)
+    
+    if actions_table.empty:
+        st.warning("Add at least one action.")
+    else:
+        actions = tuple(
+            (str(row['name']), float(row['cost']), float(row['effectiveness']))
+            for _, row in actions_table.iterrows()
+        )
+        months = VALUE_MONTHS if value_mode != "Flat (sidebar)" else 0
+        allocation = campaign_allocation(SCORES_PATH, scores_version, actions, budget, value_saved, months)
+        summary = allocation['summary']
+        total = summary.iloc[-1]
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown(metric_card(
+                "Contacted Clients",
+                f"{int(total['clients']):,}",
+                f"{total['clients'] / data['total_test'] * 100:.1f}% of sample"
+            ), unsafe_allow_html=True)
+        with col2:
+            st.markdown(metric_card(
+                "Budget Used",
+                f"{allocation['spent']:,.0f} FCFA",
+                f"of {budget:,.0f} FCFA"
+            ), unsafe_allow_html=True)
+        with col3:
+            st.markdown(metric_card("Net Benefit", f"{total['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
+        with col4:
+            st.markdown(metric_card("ROI", f"{total['roi']:.1f}%"), unsafe_allow_html=True)
+        
+        df_display = summary.copy()
+        for column in ['expected_down', 'retained']:
+            df_display[column] = df_display[column].round(1)
+        for column in ['total_cost', 'value_saved', 'net_benefit']:
+            df_display[column] = df_display[column].apply(lambda x: f"{x:,.0f} FCFA")
+        df_display['roi'] = df_display['roi'].apply(lambda x: f"{x:.1f}%")
+        st.dataframe(df_display, use_container_width=True, hide_index=True)
+        export_target = (
+            f"campaign_{budget}",
+            lambda: allocation_targets(
+                allocation, [{'name': n, 'cost': c, 'effectiveness': e} for n, c, e in actions]
+            )
+        )
+
+# ============================================================
+# MODE 6: SEGMENTS
+# ============================================================
+
+elif target_mode == "Segments":
+    st.markdown("###  Segment Explorer")
+    
+    CUBE_PATH = cube_path(SCORES_PATH)
+    if not os.path.exists(CUBE_PATH):
+        st.info(
+            f"Segment cube not found at `{CUBE_PATH}`. "
+            "Export it from the notebook with `build_cube` / `save_cube`."
+        )
+    else:
+        cube_version = store_version(CUBE_PATH)
+        cube = load_segments(CUBE_PATH, cube_version)
+        
+        # Any combination of dimensions; an empty selection keeps every value
+        dimensions = [c for c in cube.columns if c not in SERVICE_FLAGS + ['clients', 'downs', 'score_sum']]
+        filters = {}
+        
+        columns = st.columns(len(dimensions))
+        for col, dim in zip(columns, dimensions):
+            with col:
+                filters[dim] = st.multiselect(dim, options=sorted(cube[dim].astype(str).unique()))
+        
+        columns = st.columns(len(SERVICE_FLAGS))
+        for col, flag in zip(columns, SERVICE_FLAGS):
+            with col:
+                choice = st.selectbox(flag, ["Any", "Yes", "No"])
+                filters[flag] = [] if choice == "Any" else [1 if choice == "Yes" else 0]
+        
+        segment = tuple((dim, tuple(values)) for dim, values in filters.items() if values)
+        results = segment_scenario(CUBE_PATH, cube_version, action_cost, value_saved, effectiveness, segment)
+        
+        if results['clients'] == 0:
+            st.warning("No customer matches this segment.")
+        else:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.markdown(metric_card(
+                    "Segment Clients",
+                    f"{results['clients']:,}",
+                    f"{results['clients'] / data['total_test'] * 100:.1f}% of sample"
+                ), unsafe_allow_html=True)
+            with col2:
+                st.markdown(metric_card(
+                    "Down Rate in Segment",
+                    f"{results['down_rate']*100:.1f}%",
+                    f"mean score {results['mean_score']:.3f}"
+                ), unsafe_allow_html=True)
+            with col3:
+                st.markdown(metric_card("Net Benefit", f"{results['net_benefit']:,.0f} FCFA"), unsafe_allow_html=True)
+            with col4:
+                st.markdown(metric_card("Investment", f"{results['total_cost']:,.0f} FCFA"), unsafe_allow_html=True)
+            
+            # ROI Card
+            roi_color = ORANGE_PRIMARY if results['roi'] > 0 else GRAY_DARK
+            st.markdown(f"""
+            <div class='roi-card' style='background-color: {roi_color};'>
+                <h2>ROI: {results['roi']:.1f}%</h2>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Drill-down of the segment along one dimension
+            breakdown_dim = st.selectbox("Break down by", dimensions + SERVICE_FLAGS)
+            st.plotly_chart(
+                segment_figure(CUBE_PATH, cube_version, breakdown_dim, segment, data['global_down_rate']),
+                use_container_width=True
+            )
 
 # ============================================================
-# MODE 3: CUSTOM
+# MODE 7: CUSTOM
 # ============================================================
 
 else:
@@ -575,14 +1247,17 @@ else:
     </div>
     """, unsafe_allow_html=True)
 
+profiler.end(section)
+
 # ============================================================
 # REFERENCE TABLES
 # ============================================================
 
+section = profiler.begin("reference")
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown("###  Reference Data")
 
-tab1, tab2, tab3 = st.tabs([" Deciles", " Thresholds", " Metrics"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs([" Deciles", " Thresholds", " Metrics", " Score Distribution", " Drift"])
 
 with tab1:
     df_display = data['deciles'].copy()
@@ -611,51 +1286,119 @@ with tab3:
             <li><strong>Test sample:</strong> {data['total_test']:,} customers</li>
             <li><strong>Global down-sell rate:</strong> {data['global_down_rate']*100:.1f}%</li>
             <li><strong>Optimal F1 threshold:</strong> 0.423</li>
-            <li><strong>Optimal ROI threshold:</strong> 0.7</li>
+            <li><strong>Net-benefit optimal threshold (current settings):</strong> {economic_optimum(SCORES_PATH, scores_version, action_cost, value_saved, effectiveness)['max_net_benefit']['threshold']:.3f}</li>
             <li><strong>Decile 1:</strong> {data['deciles'].iloc[0]['rate']*100:.1f}% down-sell rate</li>
         </ul>
     </div>
     """, unsafe_allow_html=True)
 
+with tab4:
+    st.plotly_chart(score_distribution_figure(SCORES_PATH, scores_version), use_container_width=True)
+
+with tab5:
+    if not os.path.exists(DRIFT_REPORT_PATH):
+        st.info(
+            f"No drift report at `{DRIFT_REPORT_PATH}`. "
+            "Run `python -m downsell.drift` on the new month or set DOWNSELL_DRIFT_REPORT."
+        )
+    else:
+        drift_version = store_version(DRIFT_REPORT_PATH)
+        report = load_drift_report(DRIFT_REPORT_PATH, drift_version)
+        n_alerts = sum(row['status'] == 'alert' for row in report['columns'])
+        st.markdown(f"""
+        <div style='background-color: {GRAY_LIGHT}; padding: 15px; border-radius: 5px; border-left: 4px solid {ORANGE_PRIMARY if n_alerts else GRAY_DARK};'>
+            <strong>{report['label']}</strong> ({report['n']:,} customers, checked {report['created_at']}) vs training reference
+            ({report['n_reference']:,} customers): <strong>{n_alerts}</strong> column(s) with PSI ≥ {PSI_ALERT}
+        </div>
+        """, unsafe_allow_html=True)
+        st.plotly_chart(drift_figure(DRIFT_REPORT_PATH, drift_version), use_container_width=True)
+        st.dataframe(report_frame(report).round(4), use_container_width=True, hide_index=True)
+
+profiler.end(section)
+
 # ============================================================
 # EXPORT SECTION
 # ============================================================
 
+section = profiler.begin("export")
 st.markdown("<hr>", unsafe_allow_html=True)
 st.markdown("###  Export Results")
 
-if st.button(" Generate Simulation Report", use_container_width=True):
-    # Create summary DataFrame
-    summary = pd.DataFrame({
-        'Parameter': [
-            'Cost per action',
-            'Value saved',
-            'Effectiveness',
-            'Global down rate',
-            'ROI Decile 1',
-            'ROI Deciles 1-3',
-            'ROI Threshold 0.7'
-        ],
-        'Value': [
-            f"{action_cost} FCFA",
-            f"{value_saved} FCFA",
-            f"{effectiveness*100:.0f}%",
-            f"{data['global_down_rate']*100:.1f}%",
-            f"{calculate_roi(17142, 0.9151, action_cost, value_saved, effectiveness)['roi']:.1f}%",
-            f"{calculate_roi(51426, 0.689, action_cost, value_saved, effectiveness)['roi']:.1f}%",
-            f"{calculate_roi(29634, 0.755, action_cost, value_saved, effectiveness)['roi']:.1f}%"
-        ]
-    })
-    
-    csv = summary.to_csv(index=False)
+# Reference campaigns computed from the scored population
+roi_d1 = decile_scenario(SCORES_PATH, scores_version, action_cost, value_saved, effectiveness, (1,))
+roi_d123 = decile_scenario(SCORES_PATH, scores_version, action_cost, value_saved, effectiveness, (1, 2, 3))
+roi_t07 = threshold_scenario(SCORES_PATH, scores_version, action_cost, value_saved,
+                             effectiveness, "Probability threshold", 0.7)['results']
+
+summary = pd.DataFrame({
+    'Parameter': [
+        'Cost per action',
+        'Value saved',
+        'Effectiveness',
+        'Global down rate',
+        'ROI Decile 1',
+        'ROI Deciles 1-3',
+        'ROI Threshold 0.7'
+    ],
+    'Value': [
+        f"{action_cost} FCFA",
+        f"{value_saved} FCFA",
+        f"{effectiveness*100:.0f}%",
+        f"{data['global_down_rate']*100:.1f}%",
+        f"{roi_d1['roi']:.1f}% ({roi_d1['clients']:,} clients)",
+        f"{roi_d123['roi']:.1f}% ({roi_d123['clients']:,} clients)",
+        f"{roi_t07['roi']:.1f}% ({roi_t07['clients']:,} clients)"
+    ]
+})
+
+col1, col2 = st.columns(2)
+
+with col1:
     st.download_button(
-        label=" Download Report (CSV)",
-        data=csv,
+        label=" Download Simulation Report (CSV)",
+        data=summary.to_csv(index=False),
         file_name="down_sell_simulation.csv",
         mime="text/csv",
         use_container_width=True
     )
 
+with col2:
+    if export_target is None:
+        st.info("Select a Decile, Threshold, Optimizer, Expected Value or Campaign Budget target to export its customer list.")
+    else:
+        export_name, export_rows = export_target
+        export_format = st.selectbox("Target list format", list(EXPORT_FORMATS))
+        
+        # Streamed from the scored store to disk, chunk by chunk; the server
+        # file is per session so that concurrent analysts never share it
+        export_file = f"targets_{export_name}{EXPORT_FORMATS[export_format]}"
+        session_id = st.session_state.setdefault("export_session", uuid.uuid4().hex[:12])
+        if st.button(" Generate Target List", use_container_width=True):
+            # a new list replaces this session's previous one; idle sessions are dropped
+            session_dir = os.path.join(EXPORT_DIR, session_id)
+            shutil.rmtree(session_dir, ignore_errors=True)
+            cleanup_exports(EXPORT_DIR, EXPORT_MAX_AGE_HOURS * 3600)
+
+            export_path = os.path.join(session_dir, export_file)
+            positions, extra = export_rows()
+            n_rows = write_target_list(export_path, load_population(SCORES_PATH, scores_version), positions, extra)
+            size_mb = os.path.getsize(export_path) / 1e6
+            st.caption(f"{n_rows:,} customers written on the server ({size_mb:.1f} MB): `{export_path}`")
+            if size_mb <= DOWNLOAD_MAX_MB:
+                with open(export_path, 'rb') as f:
+                    st.download_button(
+                        label=f" Download {n_rows:,} Customers",
+                        data=f,
+                        file_name=export_file,
+                        mime="application/octet-stream",
+                        use_container_width=True
+                    )
+            else:
+                st.info(f"Above the {DOWNLOAD_MAX_MB:g} MB download limit: fetch the file from the server path above.")
+            section['rows'] = n_rows
+
+profiler.end(section)
+
 # ============================================================
 # METHODOLOGICAL NOTES
 # ============================================================
@@ -664,9 +1407,9 @@ with st.expander(" Methodological Notes"):
     st.markdown(f"""
     <div style='background-color: {GRAY_LIGHT}; padding: 15px; border-radius: 5px;'>
         <ul style='color: {BLACK};'>
-            <li><strong>Population:</strong> Analysis based on 857k customers with known M1-M2 variation</li>
-            <li><strong>Test sample:</strong> 171k customers (20% of analyzed population)</li>
-            <li><strong>Global down-sell rate:</strong> 40.4% in this sample</li>
+            <li><strong>Population:</strong> Analysis based on {data['total_clients']:,} customers with known M1-M2 variation</li>
+            <li><strong>Scored sample:</strong> {data['total_test']:,} customers</li>
+            <li><strong>Global down-sell rate:</strong> {data['global_down_rate']*100:.1f}% in this sample</li>
             <li><strong>Retention hypothesis:</strong> {effectiveness*100:.0f}% of contacted down-sellers are saved (adjustable)</li>
             <li><strong>Saved value:</strong> {value_saved:,} FCFA per customer (estimated annual ARPU)</li>
             <li><strong>Contact cost:</strong> {action_cost} FCFA per customer</li>
@@ -688,3 +1431,17 @@ st.markdown(f"""
 </div>
 
 """, unsafe_allow_html=True)
+
+# ============================================================
+# DEBUG PANEL
+# ============================================================
+
+if DEBUG:
+    with st.sidebar:
+        with st.expander(" Stage Timings", expanded=True):
+            timings = profiler.frame()[['stage', 'wall_s', 'cpu_s', 'rows', 'peak_rss_mb', 'rss_increase_mb']]
+            st.dataframe(timings.round(3), use_container_width=True, hide_index=True)
+            st.caption(
+                f"Rerun `{profiler.run_id}`: {timings['wall_s'].sum():.3f} s"
+                + (f", logged to `{PROFILE_LOG}`" if PROFILE_LOG else "")
+            )
@@ -0,0 +1,21 @@
+"""
+Performance regression check of the pipeline stages against the committed
+baseline (benchmarks/baseline.json).  Opt-in, as it takes minutes and depends
+on the machine: DOWNSELL_BENCH=1 python -m pytest tests/test_benchmark.py
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_pipeline import BASELINE_PATH, load_baseline, regressions, run
+
+ROWS = 100_000
+
+
+@pytest.mark.skipif(os.environ.get('DOWNSELL_BENCH') != '1', reason="set DOWNSELL_BENCH=1 to run the benchmark")
+def test_no_regression(tmp_path):
+    baseline = load_baseline(BASELINE_PATH)
+    assert str(ROWS) in baseline, f"no {ROWS}-row baseline in {BASELINE_PATH}"
+
+    results = {str(ROWS): run(ROWS, str(tmp_path))}
+    assert regressions(results, baseline) == []
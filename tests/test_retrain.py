@@ -0,0 +1,46 @@
+"""
+Incremental retraining of a model saved the way the notebook saves it
+(XGBoost fitted on the col_keep DataFrame, so the booster carries feature names).
+"""
+import numpy as np
+import pytest
+
+from downsell.features import COL_KEEP
+from downsell.models import XGBOOST_AVAILABLE, load_model, make_model, save_model
+from downsell.retrain import add_month, list_months, retrain_month
+from downsell.synthetic import generate_months
+from downsell.training import build_training_set
+
+
+@pytest.mark.skipif(not XGBOOST_AVAILABLE, reason="feature names are checked by XGBoost continued training")
+def test_retrain_notebook_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    months = generate_months(3000, str(tmp_path / 'data'), n_workers=1)
+
+    X, y, encoder = build_training_set(*months)
+    model = make_model((y == 0).sum() / (y == 1).sum(), n_estimators=20)
+    model.fit(X, y)
+    model_path = save_model(model, str(tmp_path / 'models' / 'xgb_model.json'))
+    encoder_path = str(tmp_path / 'models' / 'target_encoder.npz')
+    encoder.save(encoder_path)
+
+    record = retrain_month(
+        months, '2026-01', model_path, encoder_path, n_trees=5, compare_full=True,
+        store_dir=str(tmp_path / 'store'), report_path=str(tmp_path / 'models' / 'report.json')
+    )
+
+    updated = load_model(model_path)
+    assert updated.get_booster().feature_names == list(X.columns)
+    assert updated.get_booster().num_boosted_rounds() == 25
+    assert 0.5 < record['auc_incremental'] <= 1
+    assert 'auc_full' in record
+
+
+def test_store_rejects_older_month(tmp_path):
+    X, y = np.zeros((4, len(COL_KEEP)), dtype=np.float32), np.array([0, 1, 0, 1])
+    add_month('2026-01', X, y, str(tmp_path), window=2)
+    add_month('2026-02', X, y, str(tmp_path), window=2)
+    add_month('2026-02', X, y, str(tmp_path), window=2)
+    with pytest.raises(ValueError):
+        add_month('2025-12', X, y, str(tmp_path), window=2)
+    assert list_months(str(tmp_path)) == ['2026-01', '2026-02']